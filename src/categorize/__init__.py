@@ -5,29 +5,63 @@ This package contains modules for adding categories to OWID files on Wikimedia C
 """
 
 from .wiki import (
+    CONNECTION_POOL_SIZE,
+    EDIT_WORKERS,
     connect_to_commons,
     add_category_to_page,
+    add_categories_bulk,
+    add_categories_to_page,
     ensure_category_exists,
     get_category_member_count,
+    get_category_member_counts_bulk,
     get_page_text,
+    get_page_info_and_text,
+    fetch_pages_bulk,
     category_exists_on_page,
+    extract_categories,
     get_category_members,
 )
 
+from .cache import (
+    enable_cache,
+    enable_edit_log,
+    enable_members_cache,
+    invalidate_cache,
+    is_edited,
+    save_cache,
+)
+
 from .category_members import (
     get_category_members_petscan,
     fetch_category_members,
+    fetch_category_members_many,
 )
 __all__ = [
     # Wiki functions
+    "CONNECTION_POOL_SIZE",
+    "EDIT_WORKERS",
     "connect_to_commons",
     "add_category_to_page",
+    "add_categories_bulk",
+    "add_categories_to_page",
     "ensure_category_exists",
     "get_category_member_count",
+    "get_category_member_counts_bulk",
     "get_page_text",
+    "get_page_info_and_text",
+    "fetch_pages_bulk",
     "category_exists_on_page",
+    "extract_categories",
+    # Cache functions
+    "enable_cache",
+    "enable_edit_log",
+    "enable_members_cache",
+    "invalidate_cache",
+    "is_edited",
+    "save_cache",
     # Utility functions
     "get_category_members_petscan",
     "get_category_members",
     "fetch_category_members",
+    "fetch_category_members_many",
 ]
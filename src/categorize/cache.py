@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for category information on Wikimedia Commons.
+
+Category existence and member counts rarely change between runs, so they are
+kept in a small JSON file and reused until the week changes.
+Category member lists are cached per category in separate files for a day.
+Categories added to files are logged, so an interrupted run can resume
+without editing the same files again (member lists can lag behind edits).
+All are disabled until enable_cache() / enable_members_cache() / enable_edit_log() is called.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Member lists older than this are fetched again
+MEMBERS_CACHE_TTL = 24 * 60 * 60  # seconds
+
+_CACHE_FILE: Optional[Path] = None
+_CACHE: Dict[str, Dict] = {}
+
+_MEMBERS_CACHE_DIR: Optional[Path] = None
+
+_EDIT_LOG_FILE: Optional[Path] = None
+_EDITED: Set[Tuple[str, str]] = set()
+_edit_log_lock = threading.Lock()
+
+
+def _current_period() -> str:
+    """Return the current ISO year and week (entries expire weekly)."""
+    year, week, _ = date.today().isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def enable_cache(cache_file: Path) -> None:
+    """
+    Enable the cache and load entries saved during the current week.
+
+    Args:
+        cache_file: Path to the JSON cache file
+    """
+    global _CACHE_FILE, _CACHE
+
+    _CACHE_FILE = cache_file
+    _CACHE = {}
+
+    if not cache_file.exists():
+        return
+
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Ignoring unreadable cache file {cache_file}: {e}")
+        return
+
+    if data.get("period") == _current_period():
+        _CACHE = data.get("categories", {})
+        logging.info(f"Loaded {len(_CACHE)} cached categories from {cache_file}")
+
+
+def disable_cache() -> None:
+    """Disable the cache and drop all in-memory entries."""
+    global _CACHE_FILE, _CACHE
+
+    _CACHE_FILE = None
+    _CACHE = {}
+
+
+def get_cached(category: str, key: str):
+    """
+    Get a cached value for a category.
+
+    Args:
+        category: Category title
+        key: Cached field ("exists" or "count")
+
+    Returns:
+        Cached value or None if not cached (or cache disabled)
+    """
+    if _CACHE_FILE is None:
+        return None
+    return _CACHE.get(category, {}).get(key)
+
+
+def set_cached(category: str, key: str, value) -> None:
+    """
+    Store a value for a category.
+
+    Args:
+        category: Category title
+        key: Cached field ("exists" or "count")
+        value: Value to store
+    """
+    if _CACHE_FILE is None:
+        return
+    _CACHE.setdefault(category, {})[key] = value
+
+
+def invalidate_cache(category: str) -> None:
+    """
+    Drop cached values for a category (e.g., after adding a file to it).
+
+    Args:
+        category: Category title
+    """
+    _CACHE.pop(category, None)
+
+
+def save_cache() -> None:
+    """Write the cache to disk."""
+    if _CACHE_FILE is None:
+        return
+
+    _CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+    data = {
+        "period": _current_period(),
+        "categories": _CACHE,
+    }
+    # Write to a temporary file and swap it in, so an interrupted write can't corrupt the cache
+    tmp_file = _CACHE_FILE.with_name(_CACHE_FILE.name + ".tmp")
+    tmp_file.write_bytes(json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8"))
+    os.replace(tmp_file, _CACHE_FILE)
+
+    logging.info(f"Saved {len(_CACHE)} cached categories to {_CACHE_FILE}")
+
+
+def enable_members_cache(cache_dir: Path) -> None:
+    """
+    Enable caching of category member lists.
+
+    Args:
+        cache_dir: Directory holding one JSON file per cached category
+    """
+    global _MEMBERS_CACHE_DIR
+    _MEMBERS_CACHE_DIR = cache_dir
+
+
+def disable_members_cache() -> None:
+    """Disable caching of category member lists."""
+    global _MEMBERS_CACHE_DIR
+    _MEMBERS_CACHE_DIR = None
+
+
+def cache_members(func: Callable[[str], List[str]]) -> Callable[[str], List[str]]:
+    """
+    Decorator caching the member list returned for a category on disk.
+
+    Entries are keyed by function name and category, and expire after MEMBERS_CACHE_TTL.
+    Empty results are not cached, so failed requests are retried on the next call.
+    """
+    @functools.wraps(func)
+    def wrapper(category: str) -> List[str]:
+        if _MEMBERS_CACHE_DIR is None:
+            return func(category)
+
+        key = hashlib.sha1(f"{func.__name__}:{category}".encode("utf-8")).hexdigest()
+        cache_file = _MEMBERS_CACHE_DIR / f"{key}.json"
+
+        if cache_file.exists() and time.time() - cache_file.stat().st_mtime < MEMBERS_CACHE_TTL:
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    members = json.load(f)
+                logging.info(f"Loaded {len(members)} cached members of {category}")
+                return members
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Ignoring unreadable cache file {cache_file}: {e}")
+
+        members = func(category)
+
+        if members:
+            _MEMBERS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            cache_file.write_bytes(json.dumps(members, ensure_ascii=False).encode("utf-8"))
+
+        return members
+
+    return wrapper
+
+
+def enable_edit_log(log_file: Path) -> None:
+    """
+    Enable the log of added categories and load the entries of the current week.
+
+    Args:
+        log_file: Path to the JSON lines log file
+    """
+    global _EDIT_LOG_FILE, _EDITED
+
+    _EDIT_LOG_FILE = log_file
+    _EDITED = set()
+
+    if not log_file.exists():
+        return
+
+    period = _current_period()
+    stale = False
+    try:
+        with open(log_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Ignore a partially written last line
+                    stale = True
+                    continue
+                if entry.get("period") == period:
+                    _EDITED.add((entry["category"], entry["title"]))
+                else:
+                    stale = True
+    except OSError as e:
+        logging.warning(f"Ignoring unreadable edit log {log_file}: {e}")
+        return
+
+    # Drop old entries so the log doesn't grow across weeks
+    if stale:
+        log_file.write_bytes("".join(
+            json.dumps({"period": period, "category": category, "title": title}, ensure_ascii=False) + "\n"
+            for category, title in sorted(_EDITED)
+        ).encode("utf-8"))
+
+    logging.info(f"Loaded {len(_EDITED)} logged edits from {log_file}")
+
+
+def disable_edit_log() -> None:
+    """Disable the log of added categories and drop all in-memory entries."""
+    global _EDIT_LOG_FILE, _EDITED
+
+    _EDIT_LOG_FILE = None
+    _EDITED = set()
+
+
+def is_edited(category: str, title: str) -> bool:
+    """
+    Check if a category was added to a file during this week's runs.
+
+    Args:
+        category: Category title
+        title: File title
+
+    Returns:
+        True if the edit was logged, False otherwise (or if the log is disabled)
+    """
+    return (category, title) in _EDITED
+
+
+def record_edit(category: str, title: str) -> None:
+    """
+    Log that a category was added to a file (appended to the log immediately).
+
+    Args:
+        category: Category title
+        title: File title
+    """
+    if _EDIT_LOG_FILE is None:
+        return
+
+    line = json.dumps({"period": _current_period(), "category": category, "title": title}, ensure_ascii=False) + "\n"
+    with _edit_log_lock:
+        _EDITED.add((category, title))
+        _EDIT_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(_EDIT_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(line)
@@ -5,62 +5,163 @@ OWID Commons File Fetcher and Processor
 
 import time
 import logging
+import random
 import urllib
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson  # Optional: faster JSON parsing
+except ImportError:
+    orjson = None
+
+from .cache import cache_members
 
 logger = logging.getLogger(__name__)
 
 # Configuration
 API_ENDPOINT = "https://commons.wikimedia.org/w/api.php"
+PETSCAN_URL = "https://petscan.wmflabs.org/"
+
+# Fixed query parameters (only the category changes between calls)
+PETSCAN_PARAMS = {
+    "language": "commons",
+    "project": "wikimedia",
+    "format": "plain",
+    "depth": 0,
+    "ns[6]": 1,
+    "doit": "Do it!"
+}
+CATEGORYMEMBERS_PARAMS = {
+    "action": "query",
+    "format": "json",
+    "formatversion": 2,
+    "generator": "categorymembers",
+    "gcmtype": "file",
+    "gcmlimit": "max",
+    "prop": "info"
+}
+
+# Retry settings for transient API failures (rate limiting / server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0  # seconds
+MAX_BACKOFF = 60.0  # seconds
+
+# Upper bound on concurrent category fetches (MediaWiki etiquette)
+MAX_FETCH_WORKERS = 8
 
 # User-Agent header (required by Wikimedia)
 USER_AGENT = "OWID-Commons-Processor/1.0 (https://github.com/MrIbrahem/OWID-categories; contact via GitHub)"
 
+# Shared HTTP session so paginated requests reuse the same keep-alive connection
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": USER_AGENT})
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def backoff_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """
+    Compute how long to wait before the next retry.
+
+    Honors a numeric Retry-After header, otherwise uses exponential backoff with jitter.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF)
+
+    return min(MAX_BACKOFF, BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random())
+
 
+def _get_with_retry(
+    session: requests.Session,
+    url: str,
+    params: Optional[Dict] = None,
+    max_attempts: int = MAX_ATTEMPTS,
+    **kwargs
+) -> requests.Response:
+    """
+    Send a GET request, retrying on 429/5xx responses and connection errors.
+
+    Args:
+        session: HTTP session to use
+        url: Request URL
+        params: Optional query parameters
+        max_attempts: Maximum number of attempts
+
+    Returns:
+        Successful response
+
+    Raises:
+        requests.RequestException: If the request still fails after max_attempts
+    """
+    for attempt in range(max_attempts):
+        last_attempt = attempt == max_attempts - 1
+        try:
+            response = session.get(url, params=params, timeout=30, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last_attempt:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Request failed ({e}), retrying in {delay:.1f}s")
+        else:
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                response.raise_for_status()
+                return response
+            delay = backoff_delay(attempt, response)
+            logger.warning(f"HTTP {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+
+        time.sleep(delay)
+
+
+def _parse_json(response: requests.Response) -> Dict:
+    """Parse a JSON response body, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+@cache_members
 def get_category_members_petscan(category: str) -> list | list[str]:
     """
     Fetch all pages belonging to a given category from a Wikimedia project using the Petscan API.
     """
     # Build PetScan URL for the given category
-    base_url = "https://petscan.wmflabs.org/"
-
     if category.lower().startswith("category:"):
         category = category[9:]
 
-    params = {
-        "language": "commons",
-        "project": "wikimedia",
-        "categories": f"{category}",
-        "format": "plain",
-        "depth": 0,
-        "ns[6]": 1,
-        "doit": "Do it!"
-    }
-    url = f"{base_url}?{urllib.parse.urlencode(params)}"
+    params = {**PETSCAN_PARAMS, "categories": category}
+    url = f"{PETSCAN_URL}?{urllib.parse.urlencode(params)}"
 
     logger.info(f"petscan url: {url}")
 
-    headers = {"User-Agent": USER_AGENT}
-
-    text = ""
+    result = []
     try:
-        resp = requests.get(url, headers=headers, timeout=30)
-        resp.raise_for_status()
-        text = resp.text
+        # Stream lines instead of materializing the full response text
+        with _get_with_retry(_SESSION, url, stream=True) as resp:
+            resp.encoding = resp.encoding or "utf-8"
+            result = [
+                title
+                for line in resp.iter_lines(decode_unicode=True)
+                if (title := line.strip())
+            ]
     except requests.RequestException:
         logger.exception("get_petscan_category_pages: request error")
         return []
 
-    if not text:
+    if not result:
         logger.warning("get_petscan_category_pages: empty response")
         return []
 
-    result = [x.strip() for x in text.splitlines()]
     logger.debug(f"get_petscan_category_pages: found {len(result)} members")
     return result
 
 
+@cache_members
 def fetch_category_members(category_name: str) -> List[str]:
     """
     Fetch all file titles from the OWID category using MediaWiki API with pagination.
@@ -69,55 +170,68 @@ def fetch_category_members(category_name: str) -> List[str]:
         List of file titles (strings).
     """
     all_files = []
-    cmcontinue = None
     page_count = 0
-    delay = 1.0  # seconds
-    max_delay = 8.0
+    delay = 1.0  # seconds between pages
 
     logger.info(f"Starting to fetch files from {category_name}")
 
+    # Members and their page info come from a single generator query;
+    # only the continuation parameters change between pages
+    params = {**CATEGORYMEMBERS_PARAMS, "gcmtitle": category_name}
+
     while True:
-        params = {
-            "action": "query",
-            "format": "json",
-            "list": "categorymembers",
-            "cmtitle": category_name,
-            "cmtype": "file",
-            "cmlimit": "max"
-        }
+        response = _get_with_retry(_SESSION, API_ENDPOINT, params=params)
+        data = _parse_json(response)
 
-        if cmcontinue:
-            params["cmcontinue"] = cmcontinue
+        pages = data.get("query", {}).get("pages", [])
+        all_files.extend([x.get("title", "") for x in pages])
+        page_count += 1
 
-        try:
-            response = requests.get(
-                API_ENDPOINT,
-                params=params,
-                headers={"User-Agent": USER_AGENT},
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            members = data.get("query", {}).get("categorymembers", [])
-            all_files.extend([x.get("title", "") for x in members])
-            page_count += 1
-
-            logger.info(f"Fetched page {page_count}: {len(members)} files (total: {len(all_files)})")
-
-            if "continue" in data:
-                cmcontinue = data["continue"].get("cmcontinue")
-                time.sleep(delay)
-            else:
-                break
-
-        except requests.RequestException:
-            logger.exception("API request failed")
-            if delay < max_delay:
-                delay = min(delay * 2, max_delay)
-                time.sleep(delay)
-                continue
-            raise
+        logger.info(f"Fetched page {page_count}: {len(pages)} files (total: {len(all_files)})")
+
+        if "continue" in data:
+            params.update(data["continue"])
+            time.sleep(delay)
+        else:
+            break
 
     logger.info(f"Finished fetching {len(all_files)} files in {page_count} pages")
     return all_files
+
+
+def fetch_category_members_many(category_names: List[str], max_workers: int = MAX_FETCH_WORKERS) -> Dict[str, List[str]]:
+    """
+    Fetch file titles for several categories concurrently.
+
+    Each category is paginated by fetch_category_members; categories are fetched
+    in parallel over the shared HTTP session.
+
+    Args:
+        category_names: List of category titles (e.g., "Category:Our World in Data graphs of Canada")
+        max_workers: Number of concurrent fetches (capped at MAX_FETCH_WORKERS)
+
+    Returns:
+        Dictionary mapping each category name to its list of file titles.
+    """
+    results = {}
+    if not category_names:
+        return results
+
+    workers = max(1, min(max_workers, MAX_FETCH_WORKERS, len(category_names)))
+    logger.info(f"Fetching {len(category_names)} categories with {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch_category_members, name): name
+            for name in category_names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except (requests.RequestException, ValueError):
+                # ValueError: non-JSON body (e.g., an HTML error page) on a 200 response
+                logger.exception(f"Failed to fetch members of {name}")
+                results[name] = []
+
+    return results
@@ -7,10 +7,18 @@ including authentication, page editing, and category management.
 """
 
 import logging
+import threading
 import time
 import re
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 import mwclient
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import get_cached, set_cached, invalidate_cache, record_edit
+from .category_members import backoff_delay
 
 
 # User-Agent header (required by Wikimedia)
@@ -19,21 +27,136 @@ USER_AGENT = "OWID-Commons-Categorizer/1.0 (https://github.com/MrIbrahem/OWID-ca
 # Rate limiting: delay between edits in seconds
 EDIT_DELAY = 1
 
+# Number of edits that may start back to back before EDIT_DELAY pacing applies
+EDIT_BURST = 1
+
+# Number of concurrent edit workers (edits still start at most once per EDIT_DELAY)
+EDIT_WORKERS = 4
+
+# Retry settings for edits rejected by rate limiting or a read-only wiki
+# (mwclient itself already retries 5xx responses, connection errors and lag)
+EDIT_MAX_ATTEMPTS = 4
+EDIT_RETRY_CODES = frozenset({"ratelimited", "readonly"})
+
+# Consecutive transient edit failures after which edits are paced at half rate
+EDIT_FAILURE_THRESHOLD = 3
+
+# Default number of keep-alive connections kept open to Commons
+CONNECTION_POOL_SIZE = 16
+
+# Token bucket shared by all edit workers (refills one token every EDIT_DELAY seconds)
+_edit_lock = threading.Lock()
+_edit_tokens = float(EDIT_BURST)
+_last_refill = time.monotonic()
+_edit_failures = 0
+
+# Categories known not to exist yet (skips API lookups until they are created)
+_NONEXISTENT: Set[str] = set()
+
+# Categories confirmed to exist (or created) during this run
+_ENSURED: Set[str] = set()
+
+# Existing category pages looked up by ensure_category_exists, reused by get_category_members
+_CATEGORY_PAGES: Dict[str, mwclient.page.Page] = {}
 
-def connect_to_commons(username: str, password: str) -> Optional[mwclient.Site]:
+# Maximum number of titles per query when fetching page content
+BULK_TITLES_LIMIT = 50
+
+# Matches [[Category:Name]] or [[Category:Name|sortkey]] with case-insensitive "Category:"
+_CAT_RE = re.compile(r"\[\[\s*(?i:category)\s*:\s*([^\]|]+?)\s*(?:\|[^\]]*)?]]")
+
+
+def _wait_for_edit_slot() -> None:
+    """
+    Block until an edit may start, using a token bucket shared by all threads.
+
+    Up to EDIT_BURST edits may start at once, then one every EDIT_DELAY seconds
+    (twice that while edits keep failing, see _record_edit_result).
+    Each caller reserves its slot under the lock and sleeps outside it, so
+    waiting workers don't hold up the others.
+    """
+    global _edit_tokens, _last_refill
+
+    with _edit_lock:
+        delay = EDIT_DELAY * 2 if _edit_failures >= EDIT_FAILURE_THRESHOLD else EDIT_DELAY
+        now = time.monotonic()
+        _edit_tokens = min(EDIT_BURST, _edit_tokens + (now - _last_refill) / delay)
+        _last_refill = now
+        # Take a token; a negative balance is the queue of reserved future slots
+        _edit_tokens -= 1
+        wait = -_edit_tokens * delay if _edit_tokens < 0 else 0.0
+
+    if wait > 0:
+        time.sleep(wait)
+
+
+def _record_edit_result(success: bool) -> None:
+    """Count consecutive transient edit failures (reset by a successful edit)."""
+    global _edit_failures
+
+    with _edit_lock:
+        _edit_failures = 0 if success else _edit_failures + 1
+
+
+def _is_transient_edit_error(error: Exception) -> bool:
+    """Check if an edit failed because of rate limiting or a temporarily read-only wiki."""
+    if isinstance(error, mwclient.errors.APIError):
+        return error.code in EDIT_RETRY_CODES
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code == 429
+    return False
+
+
+def _run_edit(edit: Callable[[], None]) -> None:
+    """
+    Run an edit once the rate limiter allows it, retrying transient failures with backoff.
+
+    Args:
+        edit: Function making the edit (raises on failure)
+    """
+    for attempt in range(EDIT_MAX_ATTEMPTS):
+        _wait_for_edit_slot()
+        try:
+            edit()
+        except Exception as e:
+            if attempt + 1 >= EDIT_MAX_ATTEMPTS or not _is_transient_edit_error(e):
+                raise
+            _record_edit_result(False)
+            delay = backoff_delay(attempt, getattr(e, "response", None))
+            logging.warning("Edit rejected (%s), retrying in %.1f seconds", e, delay)
+            time.sleep(delay)
+        else:
+            _record_edit_result(True)
+            return
+
+
+def connect_to_commons(
+    username: str,
+    password: str,
+    pool_size: int = CONNECTION_POOL_SIZE
+) -> Optional[mwclient.Site]:
     """
     Connect to Wikimedia Commons using mwclient.
 
+    The returned site is safe to share between worker threads: it logs in once
+    and its requests go through a pool of up to pool_size keep-alive connections.
+
     Args:
         username: Bot username
         password: Bot password
+        pool_size: Maximum number of connections kept open (at least the number of workers)
 
     Returns:
         Connected Site object or None on failure
     """
     try:
         logging.info("Connecting to Wikimedia Commons...")
-        site = mwclient.Site("commons.wikimedia.org", clients_useragent=USER_AGENT)
+        # Pooled keep-alive session shared by all API calls made through this site
+        pool = requests.Session()
+        # mwclient only sets its User-Agent on sessions it creates, so add it here
+        pool.headers["User-Agent"] = f"{USER_AGENT} {mwclient.client.USER_AGENT}"
+        pool.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+        site = mwclient.Site("commons.wikimedia.org", pool=pool)
 
         logging.info(f"Logging in as {username}...")
         site.login(username, password)
@@ -59,18 +182,151 @@ def get_page_text(site: mwclient.Site, title: str) -> Optional[str]:
     Returns:
         Page text or None if page doesn't exist
     """
-    page = site.pages[title]
-    if page.exists:
-        return page.text()
-    return None
+    _, text = get_page_info_and_text(site, title)
+    return text
+
+
+def get_page_info_and_text(site: mwclient.Site, title: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Get page info and current text in a single API request.
+
+    Args:
+        site: Connected mwclient Site
+        title: Page title
+
+    Returns:
+        Tuple of (info, text) where:
+        - info is the page info dict (usable with site.pages.get), or None on API error
+        - text is the page text, or None if the page doesn't exist
+    """
+    try:
+        result = site.api(
+            "query",
+            prop="info|revisions",
+            inprop="protection",
+            rvprop="content|timestamp|ids",
+            rvslots="main",
+            titles=title,
+            formatversion=2,
+        )
+        info = result["query"]["pages"][0]
+    except Exception as e:
+        logging.error("Failed to get info for %s: %s", title, e)
+        return None, None
+
+    if info.get("missing") or info.get("invalid"):
+        return info, None
+
+    revisions = info.get("revisions", [])
+    if not revisions:
+        return info, ""
+
+    return info, revisions[0].get("slots", {}).get("main", {}).get("content", "")
+
+
+def fetch_pages_bulk(site: mwclient.Site, titles: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Get the text content of many pages using batched API queries.
+
+    Titles are queried in groups of BULK_TITLES_LIMIT, so thousands of pages
+    need only a handful of requests instead of one request per page.
+    Continued responses are followed, so pages whose content did not fit
+    in the first response are fetched too.
+
+    Args:
+        site: Connected mwclient Site
+        titles: Page titles
+
+    Returns:
+        Dictionary mapping each requested title to its text (None if the page doesn't exist).
+        Titles that could not be fetched are left out of the dictionary.
+    """
+    texts = {}
+
+    for start in range(0, len(titles), BULK_TITLES_LIMIT):
+        chunk = titles[start:start + BULK_TITLES_LIMIT]
+        requested = {title: title for title in chunk}
+        continue_params = {}
+        try:
+            # Large pages may not all fit in one response; follow "continue" until done
+            while True:
+                result = site.api(
+                    "query",
+                    prop="revisions",
+                    rvprop="content",
+                    rvslots="main",
+                    titles="|".join(chunk),
+                    formatversion=2,
+                    **continue_params,
+                )
+                query = result.get("query", {})
+
+                # Map normalized titles back to the requested ones
+                for item in query.get("normalized", []):
+                    requested[item["to"]] = item["from"]
+
+                for page in query.get("pages", []):
+                    title = requested.get(page.get("title"), page.get("title"))
+                    if page.get("missing") or page.get("invalid"):
+                        texts[title] = None
+                        continue
+                    revisions = page.get("revisions", [])
+                    if revisions:
+                        texts[title] = revisions[0].get("slots", {}).get("main", {}).get("content", "")
+
+                if "continue" not in result:
+                    break
+                continue_params = result["continue"]
+
+        except Exception as e:
+            logging.error(f"Failed to fetch text for {len(chunk)} pages: {e}")
+
+    logging.debug(f"Fetched text for {len(texts)} of {len(titles)} pages")
+    return texts
+
+
+def _normalize_category_name(name: str) -> str:
+    """
+    Normalize a category name (without prefix) for comparison.
+
+    Underscores and runs of whitespace become single spaces and the first letter is
+    uppercased; the rest is kept as is, since Commons titles are case-sensitive after
+    the first letter.
+    """
+    name = " ".join(name.replace("_", " ").split())
+    return name[:1].upper() + name[1:]
+
+
+@lru_cache(maxsize=1024)
+def _category_pattern(name: str) -> re.Pattern:
+    """Compile a pattern matching links to a category (name as returned by _normalize_category_name)."""
+    # Only the namespace and the first letter of the name are case-insensitive
+    first = f"[{re.escape(name[0].upper())}{re.escape(name[0].lower())}]" if name else ""
+    words = r"[\s_]+".join(re.escape(word) for word in name[1:].split(" "))
+    return re.compile(rf"\[\[\s*(?i:category)\s*:[\s_]*{first}{words}[\s_]*(?:\|[^\]]*)?]]")
+
+
+def extract_categories(page_text: str) -> Set[str]:
+    """
+    Extract all categories from page text in a single pass.
+
+    Args:
+        page_text: Page text
+
+    Returns:
+        Set of normalized (first letter uppercased, without "Category:" prefix) category names
+    """
+    if not page_text:
+        return set()
+    return {_normalize_category_name(name) for name in _CAT_RE.findall(page_text)}
 
 
-def category_exists_on_page(page_text: str, category: str) -> bool:
+def category_exists_on_page(page_text: Union[str, Set[str], None], category: str) -> bool:
     """
     Check if a category already exists on a page.
 
     Args:
-        page_text: Current page text
+        page_text: Current page text, or the set of its categories from extract_categories
         category: Category name to check (e.g., "Category:Our World in Data graphs of Canada")
 
     Returns:
@@ -79,18 +335,130 @@ def category_exists_on_page(page_text: str, category: str) -> bool:
     if not page_text:
         return False
 
-    category_simple = category.replace("Category:", "")
+    name = _normalize_category_name(category.removeprefix("Category:"))
+
+    if isinstance(page_text, str):
+        # Search for this category only (no lowercase copy of the text, no set of all categories)
+        return _category_pattern(name).search(page_text) is not None
 
-    # Match [[Category:Name]] or [[Category:Name|sortkey]] with case-insensitive "Category:"
-    pattern = rf"\[\[\s*[Cc]ategory\s*:\s*{re.escape(category_simple)}\s*(?:\|[^\]]*)?]]"
-    return bool(re.search(pattern, page_text))
+    return name in page_text
+
+
+def add_categories_to_page(
+    site: mwclient.Site,
+    title: str,
+    categories: List[str],
+    dry_run: bool = False,
+    page_text: Optional[str] = None
+) -> List[str]:
+    """
+    Add several categories to a page on Commons in a single edit.
+
+    The page categories are parsed once and shared by all checks.
+
+    Args:
+        site: Connected mwclient Site
+        title: Page title (e.g., "File:Agriculture share gdp, 1997 to 2021, CAN.svg")
+        categories: Categories to add (e.g., ["Category:Our World in Data graphs of Canada"])
+        dry_run: If True, don't actually make the edit
+        page_text: Current page text if already fetched (e.g., by fetch_pages_bulk)
+
+    Returns:
+        List of categories that were added (or would be added in dry-run)
+    """
+    info = None
+
+    if page_text is None:
+        # Get page info and current page text in one request
+        info, current_text = get_page_info_and_text(site, title)
+        if current_text is None:
+            logging.warning("Page does not exist: %s", title)
+            return []
+    else:
+        current_text = page_text
+
+    # Check which categories already exist
+    existing = extract_categories(current_text)
+    to_add = []
+    for category in categories:
+        if category_exists_on_page(existing, category):
+            logging.info("Category '%s' already exists on %s", category, title)
+            continue
+        existing.add(_normalize_category_name(category.removeprefix("Category:")))
+        to_add.append(category)
+
+    if not to_add:
+        return []
+
+    # Category links added at the end of the page
+    appended_text = "".join(f"\n[[{category}]]" for category in to_add)
+
+    if dry_run:
+        for category in to_add:
+            logging.info("[DRY RUN] Would add '%s' to %s", category, title)
+        return to_add
+
+    # Make the edit
+    edit_summary = "Adding " + ", ".join(f"[[:{category}]]" for category in to_add)
+    try:
+        if info:
+            # Reuse the fetched info instead of querying the page again
+            page = site.pages.get(title, info)
+            save_options = {}
+            revisions = info.get("revisions", [])
+            if revisions:
+                # Detect edit conflicts against the revision we read
+                save_options["basetimestamp"] = revisions[0].get("timestamp")
+
+            new_text = f"{current_text.rstrip()}{appended_text}\n"
+
+            def edit():
+                page.save(new_text, summary=edit_summary, **save_options)
+        else:
+            # Text was prefetched without page info: append the categories directly
+            # (no info query, and edits made since the text was fetched are kept)
+            def post_edit(token: str) -> Dict:
+                return site.post(
+                    "edit",
+                    title=title,
+                    appendtext=appended_text,
+                    summary=edit_summary,
+                    nocreate=1,
+                    bot=1,
+                    token=token,
+                    **{"assert": "user"},
+                )
+
+            def edit():
+                try:
+                    result = post_edit(site.get_token("edit"))
+                except mwclient.errors.APIError as e:
+                    if e.code != "badtoken":
+                        raise
+                    # The session's cached CSRF token went stale: fetch a new one and retry once
+                    result = post_edit(site.get_token("edit", force=True))
+                if result.get("edit", {}).get("result", "").lower() != "success":
+                    raise mwclient.errors.EditError(title, result.get("edit"))
+
+        _run_edit(edit)
+
+        for category in to_add:
+            logging.info("Successfully added '%s' to %s", category, title)
+            invalidate_cache(category)
+            record_edit(category, title)
+        return to_add
+
+    except Exception as e:
+        logging.error("Failed to save categories to %s: %s", title, e)
+        return []
 
 
 def add_category_to_page(
     site: mwclient.Site,
     title: str,
     category: str,
-    dry_run: bool = False
+    dry_run: bool = False,
+    page_text: Optional[str] = None
 ) -> bool:
     """
     Add a category to a page on Commons.
@@ -100,42 +468,48 @@ def add_category_to_page(
         title: Page title (e.g., "File:Agriculture share gdp, 1997 to 2021, CAN.svg")
         category: Category to add (e.g., "Category:Our World in Data graphs of Canada")
         dry_run: If True, don't actually make the edit
+        page_text: Current page text if already fetched (e.g., by fetch_pages_bulk)
 
     Returns:
         True if category was added (or would be added in dry-run), False otherwise
     """
-    page = site.pages[title]
+    return bool(add_categories_to_page(site, title, [category], dry_run, page_text=page_text))
 
-    if not page.exists:
-        logging.warning(f"Page does not exist: {title}")
-        return False
 
-    # Get current page text
-    current_text = page.text()
+def add_categories_bulk(
+    site: mwclient.Site,
+    operations: List[Tuple[str, str]],
+    dry_run: bool = False,
+    page_texts: Optional[Dict[str, Optional[str]]] = None,
+    max_workers: int = EDIT_WORKERS
+) -> List[bool]:
+    """
+    Add categories to many pages using a pool of edit workers.
+
+    Edits are rate limited globally, so after a burst of EDIT_BURST edits at most
+    one edit starts every EDIT_DELAY seconds.
 
-    # Check if category already exists
-    if category_exists_on_page(current_text, category):
-        logging.info(f"Category already exists on {title}")
-        return False
+    Args:
+        site: Connected mwclient Site
+        operations: List of (title, category) pairs
+        dry_run: If True, don't actually make the edits
+        page_texts: Optional prefetched page texts keyed by title (e.g., from fetch_pages_bulk)
+        max_workers: Number of concurrent edit workers
 
-    # Add category at the end of the page
-    new_text = current_text.rstrip() + f"\n[[{category}]]\n"
+    Returns:
+        List of results from add_category_to_page, in the same order as operations
+    """
+    if not operations:
+        return []
 
-    if dry_run:
-        logging.info(f"[DRY RUN] Would add '{category}' to {title}")
-        return True
+    page_texts = page_texts or {}
 
-    # Make the edit
-    edit_summary = f"Adding [[:{category}]]"
-    try:
-        page.save(new_text, summary=edit_summary)
-        logging.info(f"Successfully added '{category}' to {title}")
-        time.sleep(EDIT_DELAY)
-        return True
+    def add(operation: Tuple[str, str]) -> bool:
+        title, category = operation
+        return add_category_to_page(site, title, category, dry_run, page_text=page_texts.get(title))
 
-    except Exception as e:
-        logging.error(f"Failed to save category to {title}: {e}")
-        return False
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(operations)))) as executor:
+        return list(executor.map(add, operations))
 
 
 def ensure_category_exists(
@@ -158,12 +532,30 @@ def ensure_category_exists(
     Returns:
         True if category exists or was created, False on error
     """
+    if category_title in _ENSURED:
+        return True
+
+    if get_cached(category_title, "exists"):
+        logging.debug(f"Category already exists (cached): {category_title}")
+        _ENSURED.add(category_title)
+        return True
+
+    if dry_run and category_title in _NONEXISTENT:
+        logging.info(f"[DRY RUN] Would create category page: {category_title}")
+        return True
+
     category_page = site.pages[category_title]
 
     if category_page.exists:
+        _CATEGORY_PAGES[category_title] = category_page
         logging.debug(f"Category already exists: {category_title}")
+        set_cached(category_title, "exists", True)
+        _NONEXISTENT.discard(category_title)
+        _ENSURED.add(category_title)
         return True    # Category already exists
 
+    _NONEXISTENT.add(category_title)
+
     # Category doesn't exist, create it
     category_content = f"[[Category:{parent_category}|{sort_key}]]"
 
@@ -177,6 +569,9 @@ def ensure_category_exists(
     try:
         category_page.save(category_content, summary=edit_summary)
         logging.info(f"Created category page: {category_title}")
+        set_cached(category_title, "exists", True)
+        _NONEXISTENT.discard(category_title)
+        _ENSURED.add(category_title)
         return True
     except Exception as e:
         logging.error(f"Failed to create category page '{category_title}': {e}")
@@ -194,12 +589,20 @@ def get_category_members(site: mwclient.Site, category: str) -> list:
     Returns:
         List of Page objects (empty list if category doesn't exist)
     """
+    if category in _NONEXISTENT:
+        logging.debug(f"Category doesn't exist yet: {category}")
+        return []
+
     try:
-        # mwclient handles the "Category:" prefix automatically.
-        category_page = site.pages[category]
+        # Reuse the page loaded by ensure_category_exists (saves an info request)
+        category_page = _CATEGORY_PAGES.get(category)
+        if category_page is None:
+            # mwclient handles the "Category:" prefix automatically.
+            category_page = site.pages[category]
 
         if not category_page.exists:
             logging.debug(f"Category doesn't exist yet: {category}")
+            _NONEXISTENT.add(category)
             return []
 
         return list(category_page.members())
@@ -223,7 +626,71 @@ def get_category_member_count(site: mwclient.Site, category: str) -> int:
     Returns:
         Number of members in the category (0 if category doesn't exist)
     """
-    member_count = sum(1 for _ in get_category_members(site, category))
+    return get_category_member_counts_bulk(site, [category]).get(category, 0)
+
+
+def get_category_member_counts_bulk(site: mwclient.Site, categories: List[str]) -> Dict[str, int]:
+    """
+    Get the number of files in many categories using batched categoryinfo queries.
+
+    Categories are queried in groups of BULK_TITLES_LIMIT. Known missing and
+    cached categories are answered without a request. Categories found to exist
+    are remembered, so ensure_category_exists doesn't look them up again.
+
+    Args:
+        site: Connected mwclient Site
+        categories: Category names (e.g., ["Category:Our World in Data graphs of Canada"])
 
-    logging.debug(f"Category '{category}' has {member_count} members")
-    return member_count
+    Returns:
+        Dictionary mapping each category to its member count (0 if it doesn't exist).
+        Categories whose count could not be fetched are left out of the dictionary.
+    """
+    counts = {}
+    to_query = []
+
+    for category in dict.fromkeys(categories):
+        if category in _NONEXISTENT:
+            logging.debug("Category doesn't exist yet: %s", category)
+            counts[category] = 0
+            continue
+
+        cached_count = get_cached(category, "count")
+        if cached_count is not None:
+            logging.debug("Category '%s' has %d members (cached)", category, cached_count)
+            counts[category] = cached_count
+            continue
+
+        to_query.append(category)
+
+    # categoryinfo returns the member counts in a single request, without paginating members
+    for start in range(0, len(to_query), BULK_TITLES_LIMIT):
+        chunk = to_query[start:start + BULK_TITLES_LIMIT]
+        try:
+            result = site.api("query", prop="categoryinfo", titles="|".join(chunk), formatversion=2)
+            query = result.get("query", {})
+
+            # Map normalized titles back to the requested ones
+            requested = {category: category for category in chunk}
+            for item in query.get("normalized", []):
+                requested[item["to"]] = item["from"]
+
+            for page in query.get("pages", []):
+                category = requested.get(page.get("title"), page.get("title"))
+                if not page.get("missing"):
+                    # The category page exists, so ensure_category_exists needs no page lookup
+                    set_cached(category, "exists", True)
+                    _ENSURED.add(category)
+                elif "categoryinfo" not in page:
+                    _NONEXISTENT.add(category)
+                member_count = page.get("categoryinfo", {}).get("files", 0)
+
+                set_cached(category, "count", member_count)
+                counts[category] = member_count
+                logging.debug("Category '%s' has %d members", category, member_count)
+
+        except mwclient.errors.MwClientError as e:
+            logging.error(f"API error getting member counts of {len(chunk)} categories: {e}")
+        except Exception as e:
+            logging.error(f"An unexpected error occurred getting member counts of {len(chunk)} categories: {e}")
+
+    return counts
@@ -86,8 +86,8 @@ def example_load_json():
             print(f"✓ Loaded: {sample_file}")
             print(f"  Country: {data.get('country')}")
             print(f"  ISO3: {data.get('iso3')}")
-            print(f"  Graphs: {len(data.get('graphs', []))}")
-            print(f"  Maps: {len(data.get('maps', []))}")
+            print(f"  Graphs: {len(data.get('graphs') or ())}")
+            print(f"  Maps: {len(data.get('maps') or ())}")
     else:
         print(f"✗ File not found: {sample_file}")
         print("  (Run fetch_commons_files.py first)")
@@ -10,18 +10,22 @@ Requirements:
 - requests library
 """
 
-import json
+import argparse
 import logging
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from owid_country_codes import get_country_from_iso3, get_iso3_from_country
-from owid_config import OUTPUT_DIR, LOG_DIR, COUNTRIES_DIR
+from owid_country_codes import OWID_COUNTRY_CODES, get_country_from_iso3
+from owid_config import OUTPUT_DIR, LOG_DIR, COUNTRIES_DIR, CONTINENTS_DIR, MEMBERS_CACHE_DIR
 
 from categorize import (
+    enable_members_cache,
     get_category_members_petscan,
     # fetch_category_members,
 )
-from utils import normalize_title, setup_logging
+from utils import setup_logging, write_json_file
 
 logger = logging.getLogger(__name__)
 
@@ -30,18 +34,43 @@ CATEGORY_NAME = "Category:Uploaded_by_OWID_importer_tool"
 SUMMARY_FILE = OUTPUT_DIR / "owid_summary.json"
 LOG_FILE = LOG_DIR / "fetch_commons.log"
 
+# Number of threads writing per-country/continent JSON files
+WRITE_WORKERS = 32
+
 # List of continents for classification
-CONTINENTS = {
+# Names are interned so lookups of interned regions match by identity
+CONTINENTS = frozenset(sys.intern(name) for name in (
     "Africa", "Antarctica", "Asia", "Europe", "North America",
     "South America", "Oceania", "Americas", "World"
-}
+))
+
+# Field names of the row tuples collected by fetch_files (one tuple per file);
+# rows are turned into dicts with these keys when the JSON files are written
+GRAPH_FIELDS = ("title", "indicator", "start_year", "end_year", "file_page")
+MAP_FIELDS = ("title", "indicator", "year", "region", "file_page")
+CONTINENT_MAP_FIELDS = ("title", "indicator", "year", "file_page")
+
+# Commons page URL prefix for file page URLs
+COMMONS_WIKI_URL = "https://commons.wikimedia.org/wiki/"
 
-# Regex patterns for classification
-GRAPH_PATTERN = re.compile(r",\s*(\d+)\s+to\s+(\d+),\s*(\w+)\.svg$")
-# Map pattern: country/region name followed by a single year
+# Region name -> ISO3 lookup, bound once (same as get_iso3_from_country without the extra call)
+_iso3_from_region = OWID_COUNTRY_CODES.get
+
+# Regex pattern for classification, matching either file type in a single scan.
+# It is applied to the title without its ".svg" suffix (checked separately with endswith):
+# - graph: "..., {start_year} to {end_year}, {iso3}"
+# - map: "..., {region}, {year}" (optionally " (cropped)")
 # The region/country name should start with a letter and can contain letters, spaces, hyphens, and parentheses
 # Note: Hyphen is at the end of character class to avoid being interpreted as a range
-MAP_PATTERN = re.compile(r",\s*([A-Z][A-Za-z \(\)-]+),\s*(\d+)(?: \(cropped\))?\.svg$")
+FILE_PATTERN = re.compile(
+    r",\s*(?:"
+    r"(?P<start_year>\d+)\s+to\s+(?P<end_year>\d+),\s*(?P<iso3>\w+)"
+    r"|"
+    r"(?P<region>[A-Z][A-Za-z \(\)-]+),\s*(?P<year>\d+)(?: \(cropped\))?"
+    r")$",
+    # ISO3 codes, years and region names are ASCII; ASCII mode makes \w, \d and \s cheaper
+    re.ASCII
+)
 
 
 def classify_and_parse_file(title: str) -> Tuple[Optional[str], Optional[Dict]]:
@@ -56,15 +85,24 @@ def classify_and_parse_file(title: str) -> Tuple[Optional[str], Optional[Dict]]:
         - file_type is "graph", "map", "continent_map", or None
         - parsed_data is a dict with extracted fields
     """
-    # Try graph pattern first
-    graph_match = GRAPH_PATTERN.search(title)
-    if graph_match:
-        start_year, end_year, iso3 = graph_match.groups()
+    # Only SVG files can be graphs or maps; skip the regex for anything else
+    if not title.endswith(".svg"):
+        return None, None
+
+    # Match against the title without ".svg" (endpos avoids slicing the string)
+    match = FILE_PATTERN.search(title, 0, len(title) - 4)
+    if not match:
+        # Unknown file type
+        return None, None
 
-        # Extract indicator (everything before the first comma in the normalized name)
-        base_name = normalize_title(title)
-        first_comma = base_name.find(",")
-        indicator = base_name[:first_comma].strip() if first_comma != -1 else base_name
+    # Extract indicator (everything before the first comma in the name without "File:" prefix)
+    base_name = title[5:] if title.startswith("File:") else title
+    first_comma = base_name.find(",")
+    indicator = base_name[:first_comma].strip() if first_comma != -1 else base_name
+
+    # Graph: year range and ISO3 code
+    if match.group("start_year") is not None:
+        start_year, end_year, iso3 = match.group("start_year", "end_year", "iso3")
 
         return "graph", {
             "iso3": iso3,
@@ -73,62 +111,46 @@ def classify_and_parse_file(title: str) -> Tuple[Optional[str], Optional[Dict]]:
             "end_year": int(end_year)
         }
 
-    # Try map pattern
-    map_match = MAP_PATTERN.search(title)
-    if map_match:
-        region, year = map_match.groups()
-        region = region.strip()
-
-        # Extract indicator
-        base_name = normalize_title(title)
-        first_comma = base_name.find(",")
-        indicator = base_name[:first_comma].strip() if first_comma != -1 else base_name
-
-        # Check if region is a continent
-        if region in CONTINENTS:
-            return "continent_map", {
-                "continent": region,
-                "indicator": indicator,
-                "year": int(year)
-            }
-
-        # Try to resolve region to ISO3
-        iso3 = get_iso3_from_country(region)
+    # Map: region name and single year
+    region, year = match.group("region", "year")
+    # Intern the region: fast continent lookup, and one shared string per region in the output
+    region = sys.intern(region.strip())
 
-        return "map", {
-            "iso3": iso3,
-            "region": region,
+    # Check if region is a continent
+    if region in CONTINENTS:
+        return "continent_map", {
+            "continent": region,
             "indicator": indicator,
             "year": int(year)
         }
-    # Unknown file type
-    return None, None
-
 
-def build_file_page_url(title: str) -> str:
-    """
-    Build the Commons page URL for a file.
+    # Try to resolve region to ISO3
+    iso3 = _iso3_from_region(region)
 
-    Args:
-        title: Full file title
-
-    Returns:
-        Commons page URL
-    """
-    return "https://commons.wikimedia.org/wiki/" + title.replace(" ", "_")
+    return "map", {
+        "iso3": iso3,
+        "region": region,
+        "indicator": indicator,
+        "year": int(year)
+    }
 
 
 def fetch_files(files: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], List[str]]:
     """
     Process all files and aggregate them by country and continent.
 
+    Duplicate titles are dropped (keeping the first occurrence), so each file is
+    classified once and appears once in the output.
+
     Args:
-        files: List of file dictionaries from API
+        files: List of file titles from API
 
     Returns:
         Tuple of (countries, continents, not_matched) where:
         - countries: Dictionary keyed by ISO3 code with country data
+          ("graphs" / "maps" hold GRAPH_FIELDS / MAP_FIELDS tuples)
         - continents: Dictionary keyed by continent name with continent data
+          ("maps" holds CONTINENT_MAP_FIELDS tuples)
         - not_matched: List of unmatched file titles
     """
     countries = {}
@@ -143,6 +165,9 @@ def fetch_files(files: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Lis
 
     logger.info("Starting file classification and aggregation")
 
+    # Remove duplicate titles (e.g. repeated across API pages), preserving order
+    files = list(dict.fromkeys(files))
+
     not_matched = []
     for title in files:
 
@@ -150,7 +175,7 @@ def fetch_files(files: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Lis
 
         if not file_type or not parsed_data:
             stats["unknown_count"] += 1
-            logger.debug(f"Unknown file type: {title}")
+            logger.debug("Unknown file type: %s", title)
             not_matched.append(title)
             continue
 
@@ -158,24 +183,22 @@ def fetch_files(files: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Lis
         if file_type == "continent_map":
             continent = parsed_data["continent"]
 
-            # Initialize continent entry if needed
-            if continent not in continents:
-                continents[continent] = {
+            # Initialize continent entry if needed (single lookup)
+            continent_data = continents.get(continent)
+            if continent_data is None:
+                continent_data = continents[continent] = {
                     "continent": continent,
                     "graphs": [],
                     "maps": [],
                     "unknowns": []
                 }
 
-            # Build entry
-            file_page = build_file_page_url(title)
-            entry = {
-                "title": title,
-                "indicator": parsed_data["indicator"],
-                "year": parsed_data["year"],
-                "file_page": file_page
-            }
-            continents[continent]["maps"].append(entry)
+            continent_data["maps"].append((
+                title,
+                parsed_data["indicator"],
+                parsed_data["year"],
+                COMMONS_WIKI_URL + title.replace(" ", "_")
+            ))
             stats["continent_map_count"] += 1
             continue
 
@@ -183,17 +206,18 @@ def fetch_files(files: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Lis
 
         if not iso3:
             stats["unresolved_region_count"] += 1
-            logger.debug(f"Could not resolve region: {title}")
+            logger.debug("Could not resolve region: %s", title)
             not_matched.append(title)
             continue
 
-        # Initialize country entry if needed
-        if iso3 not in countries:
+        # Initialize country entry if needed (single lookup)
+        country_data = countries.get(iso3)
+        if country_data is None:
             country_name = get_country_from_iso3(iso3)
             if not country_name:
-                logger.warning(f"Unknown ISO3 code: {iso3}")
+                logger.warning("Unknown ISO3 code: %s", iso3)
 
-            countries[iso3] = {
+            country_data = countries[iso3] = {
                 "iso3": iso3,
                 "country": country_name,
                 "graphs": [],
@@ -201,29 +225,28 @@ def fetch_files(files: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Lis
                 "unknowns": []
             }
 
-        # Build entry
-        file_page = build_file_page_url(title)
+        # Build entry (a tuple row; see GRAPH_FIELDS / MAP_FIELDS)
+        # Commons page URL, built inline to save a function call per file
+        file_page = COMMONS_WIKI_URL + title.replace(" ", "_")
 
         if file_type == "graph":
-            entry = {
-                "title": title,
-                "indicator": parsed_data["indicator"],
-                "start_year": parsed_data["start_year"],
-                "end_year": parsed_data["end_year"],
-                "file_page": file_page
-            }
-            countries[iso3]["graphs"].append(entry)
+            country_data["graphs"].append((
+                title,
+                parsed_data["indicator"],
+                parsed_data["start_year"],
+                parsed_data["end_year"],
+                file_page
+            ))
             stats["graph_count"] += 1
 
         elif file_type == "map":
-            entry = {
-                "title": title,
-                "indicator": parsed_data["indicator"],
-                "year": parsed_data["year"],
-                "region": parsed_data["region"],
-                "file_page": file_page
-            }
-            countries[iso3]["maps"].append(entry)
+            country_data["maps"].append((
+                title,
+                parsed_data["indicator"],
+                parsed_data["year"],
+                parsed_data["region"],
+                file_page
+            ))
             stats["map_count"] += 1
 
     logger.info("Classification complete:")
@@ -238,6 +261,39 @@ def fetch_files(files: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Lis
     return countries, continents, not_matched
 
 
+def _rows_to_records(data: Dict, map_fields: Tuple[str, ...]) -> Dict:
+    """
+    Convert the graph/map row tuples of a country or continent into dicts for output.
+
+    Args:
+        data: Country or continent data from fetch_files
+        map_fields: Field names of the map rows
+
+    Returns:
+        Copy of data with "graphs" and "maps" as lists of dicts
+    """
+    return {
+        **data,
+        "graphs": [dict(zip(GRAPH_FIELDS, row)) for row in data["graphs"]],
+        "maps": [dict(zip(map_fields, row)) for row in data["maps"]],
+    }
+
+
+def _write_json_files(files: List[Tuple[Path, Dict]]) -> None:
+    """
+    Write several JSON files concurrently.
+
+    Args:
+        files: List of (file_path, data) pairs
+    """
+    if not files:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(WRITE_WORKERS, len(files))) as executor:
+        # Consume the results so any write error is raised here
+        list(executor.map(lambda item: write_json_file(*item), files))
+
+
 def write_country_json_files(countries: Dict[str, Dict]):
     """
     Write individual JSON files for each country.
@@ -249,10 +305,10 @@ def write_country_json_files(countries: Dict[str, Dict]):
 
     logger.info(f"Writing {len(countries)} country JSON files")
 
-    for iso3, data in countries.items():
-        file_path = COUNTRIES_DIR / f"{iso3}.json"
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    _write_json_files([
+        (COUNTRIES_DIR / f"{iso3}.json", _rows_to_records(data, MAP_FIELDS))
+        for iso3, data in countries.items()
+    ])
 
     logger.info(f"Country JSON files written to {COUNTRIES_DIR}")
 
@@ -264,17 +320,15 @@ def write_continent_json_files(continents: Dict[str, Dict]):
     Args:
         continents: Dictionary of continent data keyed by continent name
     """
-    CONTINENTS_DIR = OUTPUT_DIR / "continents"
     CONTINENTS_DIR.mkdir(parents=True, exist_ok=True)
 
     logger.info(f"Writing {len(continents)} continent JSON files")
 
-    for continent, data in continents.items():
-        # Use continent name as filename (replace spaces with underscores)
-        safe_name = continent.replace(" ", "_")
-        file_path = CONTINENTS_DIR / f"{safe_name}.json"
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    # Use continent name as filename (replace spaces with underscores)
+    _write_json_files([
+        (CONTINENTS_DIR / f"{continent.replace(' ', '_')}.json", _rows_to_records(data, CONTINENT_MAP_FIELDS))
+        for continent, data in continents.items()
+    ])
 
     logger.info(f"Continent JSON files written to {CONTINENTS_DIR}")
 
@@ -308,8 +362,7 @@ def write_summary_json(countries: Dict[str, Dict], continents: Dict[str, Dict])
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    with open(SUMMARY_FILE, "w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    write_json_file(SUMMARY_FILE, summary)
 
     logger.info(f"Summary JSON written to {SUMMARY_FILE}")
 
@@ -328,17 +381,24 @@ def write_not_matched_files(not_matched: List[str]) -> None:
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     not_matched_file = OUTPUT_DIR / "not_matched_files.txt"
 
-    with open(not_matched_file, "w", encoding="utf-8") as f:
-        for title in not_matched:
-            f.write(f"{title}\n")
+    # Join once and write in a single call
+    not_matched_file.write_text("\n".join(not_matched) + "\n", encoding="utf-8")
 
     logger.info(f"Unmatched files written to {not_matched_file}")
 
 
-def main() -> None:
-    """Main execution function."""
+def main(refresh: bool = False) -> None:
+    """
+    Main execution function.
+
+    Args:
+        refresh: If True, ignore category members cached during the last day
+    """
     setup_logging(LOG_FILE)
 
+    if not refresh:
+        enable_members_cache(MEMBERS_CACHE_DIR)
+
     # Fetch all files from the category
     # files = fetch_category_members(CATEGORY_NAME)
     files = get_category_members_petscan(CATEGORY_NAME)
@@ -356,4 +416,14 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Fetch and classify OWID files from Wikimedia Commons"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Fetch category members again instead of using the local cache"
+    )
+    args = parser.parse_args()
+
+    main(refresh=args.refresh)
@@ -12,29 +12,32 @@ from dotenv import load_dotenv
 from pathlib import Path
 from typing import Optional
 
+# Runs once per process: later imports reuse the cached module
 load_dotenv()
 
-MAIN_DIR = Path()
-
-if os.getenv("MAIN_DIR", ""):
-    MAIN_DIR = Path(os.getenv("MAIN_DIR"))
+MAIN_DIR = Path(os.getenv("MAIN_DIR") or "")
 
 WM_USERNAME = os.getenv("WM_USERNAME")
 PASSWORD = os.getenv("PASSWORD")
 
 OUTPUT_DIR = MAIN_DIR / "output"
 LOG_DIR = MAIN_DIR / "logs"
-
-# Ensure log directory exists
-LOG_DIR.parent.mkdir(parents=True, exist_ok=True)
-OUTPUT_DIR.parent.mkdir(parents=True, exist_ok=True)
+CACHE_DIR = MAIN_DIR / ".cache"
 
 COUNTRIES_DIR = OUTPUT_DIR / "countries"
 CONTINENTS_DIR = OUTPUT_DIR / "continents"
 
+# Ensure log directory exists (output directories are created by fetch_commons_files,
+# so run_categorize can tell when Phase 1 hasn't been run)
+LOG_DIR.mkdir(parents=True, exist_ok=True)
+
 LOG_FILE_COUNTRIES = LOG_DIR / "categorize_countries.log"
 LOG_FILE_CONTINENTS = LOG_DIR / "categorize_continents.log"
 
+CATEGORY_CACHE_FILE = CACHE_DIR / "category_info.json"
+MEMBERS_CACHE_DIR = CACHE_DIR / "members"
+EDIT_LOG_FILE = CACHE_DIR / "edits.jsonl"
+
 
 def load_credentials() -> tuple[Optional[str], Optional[str]]:
     """
@@ -61,4 +64,8 @@ __all__ = [
     "CONTINENTS_DIR",
     "LOG_FILE_COUNTRIES",
     "LOG_FILE_CONTINENTS",
+    "CACHE_DIR",
+    "CATEGORY_CACHE_FILE",
+    "MEMBERS_CACHE_DIR",
+    "EDIT_LOG_FILE",
 ]
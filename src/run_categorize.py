@@ -20,6 +20,8 @@ Usage:
     python run_categorize.py --files-per-item 10                        # Process 10 files per country
     python run_categorize.py --work-path continents --files-type maps   # Process continents and maps
     python run_categorize.py --work-path continents --files-type maps --dry-run --files-per-item 1
+    python run_categorize.py --no-cache                                 # Ignore cached category info
+    python run_categorize.py --edit-workers 8                           # Run 8 concurrent edit workers
 """
 
 import argparse
@@ -27,28 +29,41 @@ import mwclient
 import logging
 import sys
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from categorize import (
+    CONNECTION_POOL_SIZE,
+    EDIT_WORKERS,
     connect_to_commons,
-    add_category_to_page,
+    add_categories_bulk,
     ensure_category_exists,
     get_category_member_count,
+    get_category_member_counts_bulk,
     get_category_members,
+    fetch_category_members_many,
+    fetch_pages_bulk,
+    enable_cache,
+    enable_edit_log,
+    is_edited,
+    save_cache,
 )
 from utils import (
     setup_logging,
     load_json_file,
+    list_json_files,
     normalize_country_name,
     build_category_name,
     get_parent_category,
 )
+from owid_country_codes import get_country_from_iso3
 from owid_config import (
     load_credentials,
     LOG_FILE_COUNTRIES,
     LOG_FILE_CONTINENTS,
     COUNTRIES_DIR,
     CONTINENTS_DIR,
+    CATEGORY_CACHE_FILE,
+    EDIT_LOG_FILE,
 )
 # List of continents to process
 CONTINENTS = [
@@ -61,6 +76,108 @@ CONTINENTS = [
 ]
 
 
+def entity_from_file_name(file_path: Path, country_or_continent: str = "country") -> Optional[str]:
+    """
+    Get the country/continent name from a JSON file name, without reading the file.
+
+    Country files are named by ISO3 code (e.g., "CAN.json") and continent files by
+    name with underscores (e.g., "North_America.json").
+
+    Args:
+        file_path: Path to country/continent JSON file
+        country_or_continent: Specify whether processing 'country' or 'continent'
+
+    Returns:
+        Country/continent name, or None if it can't be derived from the file name
+    """
+    if country_or_continent == "continent":
+        return file_path.stem.replace("_", " ")
+    return get_country_from_iso3(file_path.stem)
+
+
+def categories_of_files(
+    file_paths: List[Path],
+    files_type: str = "graphs",
+    country_or_continent: str = "country",
+) -> List[str]:
+    """
+    Get the category of each country/continent file (files without a name are left out).
+
+    Args:
+        file_paths: Paths to country/continent JSON files
+        files_type: Whether to process 'graphs' or 'maps'
+        country_or_continent: Specify whether processing 'country' or 'continent'
+
+    Returns:
+        List of category names, in file order
+    """
+    categories = []
+    for file_path in file_paths:
+        entity = entity_from_file_name(file_path, country_or_continent)
+        if not entity:
+            data = load_json_file(file_path)
+            entity = data.get(country_or_continent) if data else None
+        if entity:
+            categories.append(build_category_name(entity_name=entity, category_type=country_or_continent, files_type=files_type))
+
+    return categories
+
+
+def prefetch_member_counts(
+    site: mwclient.Site,
+    file_paths: List[Path],
+    files_type: str = "graphs",
+    country_or_continent: str = "country",
+) -> Dict[str, int]:
+    """
+    Fetch the member counts of the categories of all files in batched queries.
+
+    Args:
+        site: Connected mwclient Site
+        file_paths: Paths to country/continent JSON files
+        files_type: Whether to process 'graphs' or 'maps'
+        country_or_continent: Specify whether processing 'country' or 'continent'
+
+    Returns:
+        Dictionary mapping category name to its member count
+    """
+    categories = categories_of_files(file_paths, files_type, country_or_continent)
+    if not categories:
+        return {}
+
+    return get_category_member_counts_bulk(site, categories)
+
+
+def prefetch_category_members(
+    file_paths: List[Path],
+    files_type: str = "graphs",
+    country_or_continent: str = "country",
+    files_per_one: Optional[int] = None,
+    member_counts: Optional[Dict[str, int]] = None,
+) -> Dict[str, List[str]]:
+    """
+    Fetch the member titles of the categories of all files concurrently.
+
+    Categories already holding files_per_one files (per member_counts) are left out,
+    since process_files skips them without looking at their members.
+
+    Args:
+        file_paths: Paths to country/continent JSON files
+        files_type: Whether to process 'graphs' or 'maps'
+        country_or_continent: Specify whether processing 'country' or 'continent'
+        files_per_one: Optional limit on number of files to process per country/continent
+        member_counts: Optional category member counts fetched in advance (see prefetch_member_counts)
+
+    Returns:
+        Dictionary mapping category name to the titles of its files
+    """
+    categories = list(dict.fromkeys(categories_of_files(file_paths, files_type, country_or_continent)))
+    if files_per_one and member_counts:
+        categories = [category for category in categories if member_counts.get(category, 0) < files_per_one]
+
+    return fetch_category_members_many(categories)
+
+
 def process_files(
     site: mwclient.Site,
     file_path: Path,
@@ -68,6 +185,9 @@ def process_files(
     files_type: str = "graphs",
     files_per_one: Optional[int] = None,
     country_or_continent: str = "country",
+    edit_workers: int = EDIT_WORKERS,
+    member_counts: Optional[Dict[str, int]] = None,
+    category_members: Optional[Dict[str, List[str]]] = None,
 ) -> Dict[str, int]:
     """
     Process a single country/continent JSON file and add categories to its files.
@@ -79,6 +199,9 @@ def process_files(
         files_type: Whether to process 'graphs' or 'maps'
         files_per_one: Optional limit on number of files to process per country/continent
         country_or_continent: Specify whether processing 'country' or 'continent'
+        edit_workers: Number of concurrent edit workers
+        member_counts: Optional category member counts fetched in advance (see prefetch_member_counts)
+        category_members: Optional category member titles fetched in advance (see prefetch_category_members)
 
     Returns:
         Dictionary with statistics (added, skipped, errors)
@@ -102,6 +225,24 @@ def process_files(
         stats["errors"] += 1
         return stats
 
+    def get_member_count(category: str) -> int:
+        if member_counts and category in member_counts:
+            return member_counts[category]
+        return get_category_member_count(site, category)
+
+    # When files_per_one is set, check the category before reading the JSON file
+    # (the country/continent name is known from the file name)
+    file_category = None
+    current_member_count = 0
+    if files_per_one:
+        file_entity = entity_from_file_name(file_path, country_or_continent)
+        if file_entity:
+            file_category = build_category_name(entity_name=file_entity, category_type=country_or_continent, files_type=files_type)
+            current_member_count = get_member_count(file_category)
+            if current_member_count >= files_per_one:
+                logging.info(f"\n\t\t Skipping {file_path.stem}: Category already has {current_member_count} files (>= {files_per_one} requested)")
+                return stats
+
     # Load country/continent data
     data = load_json_file(file_path)
     if not data:
@@ -109,10 +250,10 @@ def process_files(
         return stats
 
     entity = data.get(country_or_continent)
-    files = data.get(files_type, [])
+    files = data.get(files_type) or []
 
     if not entity:
-        logging.error(f"No country/continent name in {file_path}")
+        logging.error("No country/continent name in %s", file_path)
         stats["errors"] += 1
         return stats
 
@@ -129,19 +270,18 @@ def process_files(
 
     logging.info(f"\n\t\t Processing {log_line}: {len(files)} files")
 
-    # Check if category already has enough files when files_per_one is set
     if files_per_one:
-        current_member_count = get_category_member_count(site, category)
-        if current_member_count >= files_per_one:
-            logging.info(f"\n\t\t Skipping {log_line}: Category already has {current_member_count} files (>= {files_per_one} requested)")
-            return stats
+        # Check again if the file name didn't match the data (e.g. renamed file)
+        if category != file_category:
+            current_member_count = get_member_count(category)
+            if current_member_count >= files_per_one:
+                logging.info(f"\n\t\t Skipping {log_line}: Category already has {current_member_count} files (>= {files_per_one} requested)")
+                return stats
 
         remaining_slots = files_per_one - current_member_count
         logging.info(f"\n\t\t Processing {log_line}: Category has {current_member_count} files, will add up to {remaining_slots} files")
 
-    # Apply per-country/continent file limit if specified
-    if files_per_one:
-        remaining_slots = files_per_one - current_member_count
+        # Apply per-country/continent file limit
         files = files[:remaining_slots]
         logging.info(f"Limiting to {remaining_slots} file(s) for this country")
 
@@ -152,28 +292,39 @@ def process_files(
         stats["errors"] += 1
         return stats
 
-    # check for members in the category
-    existing_members = get_category_members(site, category)
-    existing_titles = {page.name for page in existing_members}
+    # check for members in the category (prefetched titles when available)
+    if category_members and category in category_members:
+        existing_titles = set(category_members[category])
+    else:
+        existing_titles = {page.name for page in get_category_members(site, category)}
 
     logging.info(f"Category '{category}' currently has {len(existing_titles)} existing members")
 
-    # Filter out files that are already in the category
+    # Filter out files that are already in the category, or were added to it
+    # by an earlier run (the member list can lag behind recent edits)
     original_file_count = len(files)
-    files = [file for file in files if file.get("title") not in existing_titles]
+    files = [
+        file for file in files
+        if (title := file.get("title")) not in existing_titles and not is_edited(category, title)
+    ]
     stats["skipped"] += original_file_count - len(files)
     logging.info(f"After filtering, {len(files)} file(s) remain to be processed for {log_line}")
 
-    # Process files
-    for file in files:
-        title = file.get("title")
-        if not title:
-            logging.warning(f"File missing title in {file_path}")
-            stats["errors"] += 1
-            continue
+    # Collect titles once (files without a title are counted as errors, logged once)
+    titles = [file["title"] for file in files if file.get("title")]
+    missing_titles = len(files) - len(titles)
+    if missing_titles:
+        logging.warning("%d file(s) missing title in %s", missing_titles, file_path)
+        stats["errors"] += missing_titles
+
+    # Fetch the text of all remaining pages in batched queries
+    page_texts = fetch_pages_bulk(site, titles)
+
+    operations = [(title, category) for title in titles]
 
-        # Add category
-        if add_category_to_page(site, title, category, dry_run):
+    # Add category (edits run concurrently, rate limited by the wiki module)
+    for added in add_categories_bulk(site, operations, dry_run, page_texts=page_texts, max_workers=edit_workers):
+        if added:
             stats["added"] += 1
         else:
             stats["skipped"] += 1
@@ -187,6 +338,8 @@ def main(
     files_per_one: Optional[int] = None,
     work_path: str = "countries",
     files_type: str = "graphs",
+    use_cache: bool = True,
+    edit_workers: int = EDIT_WORKERS,
 ):
     """
     Main execution function for countries/continents categorization.
@@ -197,6 +350,8 @@ def main(
         files_per_one: Optional limit on number of files to process per country/continent
         work_path: Specify whether processing 'countries' or 'continents'
         files_type: Specify whether processing 'graphs' or 'maps'
+        use_cache: If True, reuse cached category existence/member counts and skip logged edits
+        edit_workers: Number of concurrent edit workers (edits are still rate limited)
     """
 
     work_dirs = {
@@ -224,6 +379,10 @@ def main(
     if files_per_one:
         logging.info(f"Processing {files_per_one} file(s) per item")
 
+    if use_cache:
+        enable_cache(CATEGORY_CACHE_FILE)
+        enable_edit_log(EDIT_LOG_FILE)
+
     # Load credentials
     username, password = load_credentials()
     if not username or not password:
@@ -232,7 +391,8 @@ def main(
         sys.exit(1)
 
     # Connect to Commons
-    site = connect_to_commons(username, password)
+    # One logged-in site shared by all workers, with a connection for each of them
+    site = connect_to_commons(username, password, pool_size=max(CONNECTION_POOL_SIZE, edit_workers))
     if not site:
         logging.error("Failed to connect to Wikimedia Commons")
         sys.exit(1)
@@ -244,7 +404,7 @@ def main(
         sys.exit(1)
 
     # Get all item JSON files
-    files = sorted(work_dir.glob("*.json"))
+    files = list_json_files(work_dir)
 
     if not files:
         logging.error(f"No item JSON files found in {work_dir}")
@@ -264,24 +424,41 @@ def main(
         "total_skipped": 0
     }
 
-    for file_path in files:
-        stats = process_files(
-            site,
-            file_path,
-            dry_run=dry_run,
-            files_type=files_type,
-            files_per_one=files_per_one,
-            country_or_continent=country_or_continent
-        )
-
-        # If no files were added or skipped, the item was skipped entirely
-        if stats["added"] == 0 and stats["skipped"] == 0 and stats["errors"] == 0:
-            total_stats["total_skipped"] += 1
-        else:
-            total_stats["added"] += stats["added"]
-            total_stats["skipped"] += stats["skipped"]
-            total_stats["errors"] += stats["errors"]
-            total_stats["total_processed"] += 1
+    # Look up all member counts up front instead of one blocking call per item
+    member_counts = None
+    if files_per_one:
+        member_counts = prefetch_member_counts(site, files, files_type, country_or_continent)
+        logging.info(f"Prefetched member counts of {len(member_counts)} categories")
+
+    # Fetch the members of all categories concurrently instead of one category per item
+    category_members = prefetch_category_members(files, files_type, country_or_continent, files_per_one, member_counts)
+    logging.info(f"Prefetched members of {len(category_members)} categories")
+
+    # Save cached category info even if the run is interrupted
+    try:
+        for file_path in files:
+            stats = process_files(
+                site,
+                file_path,
+                dry_run=dry_run,
+                files_type=files_type,
+                files_per_one=files_per_one,
+                country_or_continent=country_or_continent,
+                edit_workers=edit_workers,
+                member_counts=member_counts,
+                category_members=category_members
+            )
+
+            # If no files were added or skipped, the item was skipped entirely
+            if stats["added"] == 0 and stats["skipped"] == 0 and stats["errors"] == 0:
+                total_stats["total_skipped"] += 1
+            else:
+                total_stats["added"] += stats["added"]
+                total_stats["skipped"] += stats["skipped"]
+                total_stats["errors"] += stats["errors"]
+                total_stats["total_processed"] += 1
+    finally:
+        save_cache()
 
     # Final summary
     logging.info("\n" + "=" * 80)
@@ -332,6 +509,17 @@ if __name__ == "__main__":
         default="graphs",
         help="Specify whether to process 'graphs' or 'maps' (default: graphs)"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached category existence/member counts"
+    )
+    parser.add_argument(
+        "--edit-workers",
+        type=int,
+        default=EDIT_WORKERS,
+        help=f"Number of concurrent edit workers (default: {EDIT_WORKERS})"
+    )
     args = parser.parse_args()
 
     main(
@@ -339,5 +527,7 @@ if __name__ == "__main__":
         limit=args.limit,
         files_per_one=args.files_per_item,
         work_path=args.work_path,
-        files_type=args.files_type
+        files_type=args.files_type,
+        use_cache=not args.no_cache,
+        edit_workers=args.edit_workers
     )
@@ -7,6 +7,8 @@ This package contains modules for adding categories to OWID files on Wikimedia C
 from .utils import (
     setup_logging,
     load_json_file,
+    list_json_files,
+    write_json_file,
     normalize_country_name,
     build_category_name,
     get_parent_category,
@@ -17,6 +19,8 @@ __all__ = [
     # Utility functions
     "setup_logging",
     "load_json_file",
+    "list_json_files",
+    "write_json_file",
     "normalize_country_name",
     "build_category_name",
     "get_parent_category",
@@ -6,11 +6,66 @@ This module contains helper functions for logging, data loading,
 and country name normalization.
 """
 
+import atexit
 import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, FrozenSet, List, Optional
+
+try:
+    import orjson  # Optional: faster JSON parsing
+except ImportError:
+    orjson = None
+
+# Countries that require "the" prefix
+# Based on proper English usage for country names
+_COUNTRIES_WITH_THE: FrozenSet[str] = frozenset({
+    "Democratic Republic of Congo",
+    "Dominican Republic",
+    "Philippines",
+    "Netherlands",
+    "United Arab Emirates",
+    "United Kingdom",
+    "United States",
+    "Czech Republic",
+    "Central African Republic",
+    "Maldives",
+    "Seychelles",
+    "Bahamas",
+    "Marshall Islands",
+    "Solomon Islands",
+    "Comoros",
+    "Gambia",
+    "Vatican City",
+    # Note: "Vatican" is included to handle the variant name used in OWID country codes,
+    # even though "Vatican City" is the standard form
+    "Vatican",
+})
+
+# Normalized names, so lookups don't format a new string per call
+_NORMALIZED_COUNTRY_NAMES: Dict[str, str] = {country: f"the {country}" for country in _COUNTRIES_WITH_THE}
+
+# Background listener writing queued log records to the real handlers
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+# Supported file types (anything else falls back to "graphs")
+_FILES_TYPES: FrozenSet[str] = frozenset({"graphs", "maps"})
+
+# Category name prefixes ("... of {entity}"), keyed by files_type
+_CATEGORY_PREFIXES: Dict[str, str] = {
+    files_type: f"Category:Our World in Data {files_type} of " for files_type in _FILES_TYPES
+}
+
+# Categories whose names don't follow the "... of {entity}" pattern, keyed by (files_type, entity_name)
+_PREDEFINED_CATEGORIES = {
+    ("graphs", "World"): "Category:Our World in Data graphs of the world",
+    ("maps", "World"): "Category:Our World in Data maps of the world",
+}
 
 
 def setup_logging(log_file: Path):
@@ -20,27 +75,62 @@ def setup_logging(log_file: Path):
     Args:
         log_file: Path to log file
     """
+    global _log_listener
+
     if not log_file.parent.exists():
         log_file.parent.mkdir(parents=True, exist_ok=True)
 
     if not log_file.exists():
         log_file.touch()
 
-    logging.basicConfig(
-        level=logging.INFO,
-        # format="%(asctime)s - %(levelname)s - %(message)s",
-        format="%(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler(sys.stdout)
-        ]
+    # Stop a listener left over from a previous call, so handlers aren't duplicated
+    if _log_listener is not None:
+        _log_listener.stop()
+        atexit.unregister(_log_listener.stop)
+        for handler in _log_listener.handlers:
+            handler.close()
+
+    formatter = logging.Formatter(
+        # "%(asctime)s - %(levelname)s - %(message)s"
+        "%(levelname)s - %(message)s"
     )
+    handlers = [
+        logging.FileHandler(log_file),
+        logging.StreamHandler(sys.stdout)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Log through a queue so worker threads never block on file I/O
+    log_queue = queue.Queue(-1)
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+
+
+@lru_cache(maxsize=128)
+def _load_json_cached(path: str, mtime_ns: int, size: int) -> Dict:
+    """Parse a JSON file; memoized on (path, mtime_ns, size) so unchanged files are parsed once."""
+    content = Path(path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
 
 
 def load_json_file(file_path: Path) -> Optional[Dict]:
     """
     Load a JSON file.
 
+    Results are cached until the file's modification time or size changes,
+    so callers must not modify the returned data.
+
     Args:
         file_path: Path to the JSON file
 
@@ -48,13 +138,62 @@ def load_json_file(file_path: Path) -> Optional[Dict]:
         Parsed JSON data or None on error
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        stat = file_path.stat()
+        if not stat.st_size:
+            # Empty (e.g., truncated) file: skip opening and parsing it
+            logging.error(f"Error loading {file_path}: file is empty")
+            return None
+        # Size too, so a rewrite within one coarse mtime tick is still noticed
+        return _load_json_cached(str(file_path), stat.st_mtime_ns, stat.st_size)
     except (FileNotFoundError, json.JSONDecodeError) as e:
         logging.error(f"Error loading {file_path}: {e}")
         return None
 
 
+def list_json_files(directory: Path) -> List[Path]:
+    """
+    List the JSON files in a directory, sorted by name.
+
+    Uses os.scandir, whose entries carry the file type, so no extra stat call is made per file.
+
+    Args:
+        directory: Directory to list
+
+    Returns:
+        Sorted list of JSON file paths (empty if the directory doesn't exist)
+    """
+    try:
+        with os.scandir(directory) as entries:
+            names = sorted(
+                entry.name for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()
+            )
+    except FileNotFoundError:
+        return []
+    return [directory / name for name in names]
+
+
+def write_json_file(file_path: Path, data) -> None:
+    """
+    Write data to a JSON file (compact, UTF-8, non-ASCII characters kept).
+
+    Set the OWID_PRETTY environment variable to write 2-space indented JSON instead.
+    Uses orjson when available and writes the serialized bytes in a single call.
+
+    Args:
+        file_path: Path to the JSON file
+        data: JSON-serializable data
+    """
+    pretty = bool(os.getenv("OWID_PRETTY"))
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    elif pretty:
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    else:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    file_path.write_bytes(payload)
+
+
 def normalize_country_name(country: str) -> str:
     """
     Normalize country name by adding "the" prefix where appropriate.
@@ -67,36 +206,10 @@ def normalize_country_name(country: str) -> str:
     Returns:
         Normalized country name (e.g., "the United Kingdom", "Canada")
     """
-    # Countries that require "the" prefix
-    # Based on proper English usage for country names
-    countries_with_the = {
-        "Democratic Republic of Congo",
-        "Dominican Republic",
-        "Philippines",
-        "Netherlands",
-        "United Arab Emirates",
-        "United Kingdom",
-        "United States",
-        "Czech Republic",
-        "Central African Republic",
-        "Maldives",
-        "Seychelles",
-        "Bahamas",
-        "Marshall Islands",
-        "Solomon Islands",
-        "Comoros",
-        "Gambia",
-        "Vatican City",
-        # Note: "Vatican" is included to handle the variant name used in OWID country codes,
-        # even though "Vatican City" is the standard form
-        "Vatican",
-    }
-
-    if country in countries_with_the:
-        return f"the {country}"
-    return country
+    return _NORMALIZED_COUNTRY_NAMES.get(country, country)
 
 
+@lru_cache(maxsize=512)
 def build_category_name(entity_name: str, category_type: str = "country", files_type: str = "graphs") -> str:
     """
     Build the category name for a country or continent.
@@ -110,29 +223,22 @@ def build_category_name(entity_name: str, category_type: str = "country", files_
         (e.g., "Category:Our World in Data graphs of Canada",
                "Category:Our World in Data graphs of Africa")
     """
-    pre_defined_categories = {
-        "graphs": {
-            "World": "Category:Our World in Data graphs of the world",
-        },
-        "maps": {
-            "World": "Category:Our World in Data maps of the world",
-        },
-    }
-
-    if files_type not in pre_defined_categories:
+    prefix = _CATEGORY_PREFIXES.get(files_type)
+    if prefix is None:
         files_type = "graphs"
+        prefix = _CATEGORY_PREFIXES[files_type]
 
-    if entity_name in pre_defined_categories.get(files_type, {}):
-        return pre_defined_categories[files_type][entity_name]
+    predefined = _PREDEFINED_CATEGORIES.get((files_type, entity_name))
+    if predefined:
+        return predefined
 
     if category_type == "country":
-        normalized_name = normalize_country_name(entity_name)
-    else:
-        normalized_name = entity_name
+        entity_name = normalize_country_name(entity_name)
 
-    return f"Category:Our World in Data {files_type} of {normalized_name}"
+    return prefix + entity_name
 
 
+@lru_cache(maxsize=None)
 def get_parent_category(category_type: str = "country", files_type: str = "graphs") -> str:
     """
     Get the parent category name based on entity type.
@@ -143,14 +249,7 @@ def get_parent_category(category_type: str = "country", files_type: str = "graph
     Returns:
         Parent category name
     """
-    pre_defined_categories = {
-        "graphs": {
-        },
-        "maps": {
-        },
-    }
-
-    if files_type not in pre_defined_categories:
+    if files_type not in _FILES_TYPES:
         files_type = "graphs"
 
     if category_type == "continent":
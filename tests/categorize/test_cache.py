@@ -0,0 +1,177 @@
+"""
+Tests for categorize.cache module.
+
+Tests the on-disk cache of category existence and member counts.
+"""
+
+import json
+import pytest
+
+from categorize.cache import (
+    cache_members,
+    enable_cache,
+    enable_members_cache,
+    disable_cache,
+    disable_members_cache,
+    enable_edit_log,
+    disable_edit_log,
+    is_edited,
+    record_edit,
+    get_cached,
+    set_cached,
+    invalidate_cache,
+    save_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    """Make sure every test starts and ends with the cache disabled."""
+    disable_cache()
+    disable_members_cache()
+    disable_edit_log()
+    yield
+    disable_cache()
+    disable_members_cache()
+    disable_edit_log()
+
+
+@pytest.mark.unit
+class TestCategoryCache:
+    """Test caching category information."""
+
+    def test_cache_disabled_by_default(self):
+        """Test values are not stored while the cache is disabled."""
+        set_cached("Category:Test", "count", 3)
+        assert get_cached("Category:Test", "count") is None
+
+    def test_set_and_get(self, tmp_path):
+        """Test cached values are returned."""
+        enable_cache(tmp_path / "cache.json")
+        set_cached("Category:Test", "count", 3)
+        set_cached("Category:Test", "exists", True)
+
+        assert get_cached("Category:Test", "count") == 3
+        assert get_cached("Category:Test", "exists") is True
+        assert get_cached("Category:Other", "count") is None
+
+    def test_invalidate(self, tmp_path):
+        """Test invalidating a category drops its values."""
+        enable_cache(tmp_path / "cache.json")
+        set_cached("Category:Test", "count", 3)
+        invalidate_cache("Category:Test")
+
+        assert get_cached("Category:Test", "count") is None
+
+    def test_save_and_reload(self, tmp_path):
+        """Test the cache persists across runs."""
+        cache_file = tmp_path / "cache.json"
+        enable_cache(cache_file)
+        set_cached("Category:Test", "count", 3)
+        save_cache()
+
+        disable_cache()
+        enable_cache(cache_file)
+        assert get_cached("Category:Test", "count") == 3
+        assert list(tmp_path.iterdir()) == [cache_file], "Temporary file should be replaced"
+
+    def test_expired_cache_ignored(self, tmp_path):
+        """Test entries saved in another week are ignored."""
+        cache_file = tmp_path / "cache.json"
+        cache_file.write_text(json.dumps({
+            "period": "2000-W01",
+            "categories": {"Category:Test": {"count": 3}},
+        }), encoding="utf-8")
+
+        enable_cache(cache_file)
+        assert get_cached("Category:Test", "count") is None
+
+
+@pytest.mark.unit
+class TestMembersCache:
+    """Test caching of category member lists."""
+
+    def test_members_cached_on_disk(self, tmp_path):
+        """Test a second call is served from the cache."""
+        calls = []
+
+        @cache_members
+        def fetch(category):
+            calls.append(category)
+            return ["File:A.svg"]
+
+        enable_members_cache(tmp_path)
+        assert fetch("Category:Test") == ["File:A.svg"]
+        assert fetch("Category:Test") == ["File:A.svg"]
+
+        assert calls == ["Category:Test"], "Should only fetch once"
+
+    def test_members_cache_disabled(self):
+        """Test every call fetches while the cache is disabled."""
+        calls = []
+
+        @cache_members
+        def fetch(category):
+            calls.append(category)
+            return ["File:A.svg"]
+
+        fetch("Category:Test")
+        fetch("Category:Test")
+
+        assert len(calls) == 2
+
+    def test_empty_result_not_cached(self, tmp_path):
+        """Test empty results are fetched again."""
+        calls = []
+
+        @cache_members
+        def fetch(category):
+            calls.append(category)
+            return []
+
+        enable_members_cache(tmp_path)
+        fetch("Category:Test")
+        fetch("Category:Test")
+
+        assert len(calls) == 2
+
+
+@pytest.mark.unit
+class TestEditLog:
+    """Test logging added categories for resuming runs."""
+
+    def test_disabled_by_default(self):
+        """Test nothing is recorded while the log is disabled."""
+        record_edit("Category:Test", "File:A.svg")
+        assert not is_edited("Category:Test", "File:A.svg")
+
+    def test_record_and_resume(self, tmp_path):
+        """Test recorded edits are appended and loaded by the next run."""
+        log_file = tmp_path / "edits.jsonl"
+        enable_edit_log(log_file)
+        record_edit("Category:Test", "File:A.svg")
+        record_edit("Category:Test", "File:B.svg")
+
+        disable_edit_log()
+        enable_edit_log(log_file)
+
+        assert is_edited("Category:Test", "File:A.svg")
+        assert is_edited("Category:Test", "File:B.svg")
+        assert not is_edited("Category:Other", "File:A.svg")
+        assert len(log_file.read_text(encoding="utf-8").splitlines()) == 2
+
+    def test_old_and_partial_entries_dropped(self, tmp_path):
+        """Test entries from another week and a truncated last line are dropped."""
+        log_file = tmp_path / "edits.jsonl"
+        enable_edit_log(log_file)
+        record_edit("Category:Test", "File:A.svg")
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"period": "2000-W01", "category": "Category:Test", "title": "File:Old.svg"}) + "\n")
+            f.write('{"period": ')
+
+        disable_edit_log()
+        enable_edit_log(log_file)
+
+        assert is_edited("Category:Test", "File:A.svg")
+        assert not is_edited("Category:Test", "File:Old.svg")
+        assert len(log_file.read_text(encoding="utf-8").splitlines()) == 1, "Log should be compacted"
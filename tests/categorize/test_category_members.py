@@ -0,0 +1,152 @@
+"""
+Tests for categorize.category_members module.
+
+Tests fetching category members from the MediaWiki API and PetScan
+(with mocked HTTP calls).
+"""
+
+import json
+import pytest
+from unittest.mock import Mock, patch
+
+from categorize.category_members import (
+    _get_with_retry,
+    fetch_category_members,
+    get_category_members_petscan,
+    fetch_category_members_many,
+)
+
+
+def make_response(status_code, headers=None):
+    """Create a mock HTTP response with the given status code."""
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+@pytest.mark.unit
+class TestGetWithRetry:
+    """Test retrying of transient HTTP failures."""
+
+    def test_retry_on_rate_limit(self):
+        """Test 429 responses are retried, honoring Retry-After."""
+        session = Mock()
+        ok = make_response(200)
+        session.get.side_effect = [make_response(429, {"Retry-After": "2"}), ok]
+
+        with patch("categorize.category_members.time.sleep") as mock_sleep:
+            result = _get_with_retry(session, "https://example.org")
+
+        assert result is ok, "Should return the successful response"
+        assert session.get.call_count == 2, "Should retry once"
+        mock_sleep.assert_called_once_with(2.0)
+
+    def test_no_retry_on_client_error(self):
+        """Test 4xx errors other than 429 are not retried."""
+        session = Mock()
+        not_found = make_response(404)
+        session.get.return_value = not_found
+
+        with patch("categorize.category_members.time.sleep") as mock_sleep:
+            _get_with_retry(session, "https://example.org")
+
+        assert session.get.call_count == 1, "Should not retry"
+        assert not mock_sleep.called
+        assert not_found.raise_for_status.called, "Should raise for the error status"
+
+    def test_gives_up_after_max_attempts(self):
+        """Test server errors stop being retried after max_attempts."""
+        session = Mock()
+        session.get.return_value = make_response(503)
+
+        with patch("categorize.category_members.time.sleep"):
+            _get_with_retry(session, "https://example.org", max_attempts=3)
+
+        assert session.get.call_count == 3, "Should try exactly max_attempts times"
+
+
+@pytest.mark.unit
+class TestFetchCategoryMembers:
+    """Test paginated fetching with the categorymembers generator."""
+
+    def test_follows_continuation(self):
+        """Test continuation parameters are sent until the last page."""
+        first = make_response(200)
+        first.content = json.dumps({
+            "continue": {"gcmcontinue": "file|B", "continue": "gcmcontinue||"},
+            "query": {"pages": [{"title": "File:A.svg"}]},
+        }).encode("utf-8")
+        first.json.return_value = json.loads(first.content)
+        second = make_response(200)
+        second.content = json.dumps({"query": {"pages": [{"title": "File:B.svg"}]}}).encode("utf-8")
+        second.json.return_value = json.loads(second.content)
+
+        sent_params = []
+
+        def get_response(session, url, params=None):
+            sent_params.append(dict(params))
+            return first if len(sent_params) == 1 else second
+
+        with patch("categorize.category_members._get_with_retry", side_effect=get_response):
+            with patch("categorize.category_members.time.sleep"):
+                result = fetch_category_members("Category:Test")
+
+        assert result == ["File:A.svg", "File:B.svg"]
+        assert sent_params[0]["generator"] == "categorymembers"
+        assert sent_params[0]["gcmtitle"] == "Category:Test"
+        assert sent_params[1]["gcmcontinue"] == "file|B", "Should send continuation on the next page"
+
+
+@pytest.mark.unit
+class TestFetchCategoryMembersMany:
+    """Test concurrent fetching of several categories."""
+
+    def test_fetch_many_returns_results_per_category(self):
+        """Test each category is mapped to its own members."""
+        members = {
+            "Category:A": ["File:A1.svg", "File:A2.svg"],
+            "Category:B": ["File:B1.svg"],
+        }
+
+        with patch(
+            "categorize.category_members.fetch_category_members",
+            side_effect=lambda name: members[name],
+        ):
+            result = fetch_category_members_many(["Category:A", "Category:B"], max_workers=2)
+
+        assert result == members, "Should return members keyed by category"
+
+    def test_fetch_many_keeps_results_after_invalid_json(self):
+        """Test a category returning a non-JSON body doesn't drop the other results."""
+        def fetch(name):
+            if name == "Category:B":
+                raise json.JSONDecodeError("Expecting value", "<html>", 0)
+            return ["File:A1.svg"]
+
+        with patch("categorize.category_members.fetch_category_members", side_effect=fetch):
+            result = fetch_category_members_many(["Category:A", "Category:B"], max_workers=2)
+
+        assert result == {"Category:A": ["File:A1.svg"], "Category:B": []}, \
+            "Failed category should be empty, others kept"
+
+    def test_fetch_many_empty_list(self):
+        """Test empty input returns empty dict."""
+        assert fetch_category_members_many([]) == {}
+
+
+@pytest.mark.unit
+class TestGetCategoryMembersPetscan:
+    """Test fetching category members from PetScan."""
+
+    def test_petscan_lines(self):
+        """Test each non-empty response line becomes a title."""
+        response = make_response(200)
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=False)
+        response.iter_lines.return_value = iter(["File:A.svg", " File:B.svg ", ""])
+
+        with patch("categorize.category_members._get_with_retry", return_value=response):
+            result = get_category_members_petscan("Category:Test")
+
+        assert result == ["File:A.svg", "File:B.svg"]
@@ -5,22 +5,63 @@ Tests Wiki API functions for authentication, page editing,
 and category management on Wikimedia Commons.
 """
 
-import sys
-from pathlib import Path
 import pytest
 from unittest.mock import Mock, MagicMock, patch
+import mwclient
+import requests
 
-# Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
-
+import categorize.wiki as wiki
 from categorize.wiki import (
+    connect_to_commons,
     category_exists_on_page,
+    extract_categories,
     add_category_to_page,
+    add_categories_bulk,
+    add_categories_to_page,
     ensure_category_exists,
     get_category_member_count,
+    get_category_member_counts_bulk,
+    fetch_pages_bulk,
 )
 
 
+@pytest.fixture(autouse=True)
+def reset_nonexistent_categories():
+    """Forget categories marked as nonexistent or ensured (and their pages) by previous tests."""
+    wiki._NONEXISTENT.clear()
+    wiki._ENSURED.clear()
+    wiki._CATEGORY_PAGES.clear()
+    yield
+    wiki._NONEXISTENT.clear()
+    wiki._ENSURED.clear()
+    wiki._CATEGORY_PAGES.clear()
+
+
+@pytest.mark.unit
+class TestConnectToCommons:
+    """Test connecting to Commons."""
+
+    def test_connection_pool_size(self):
+        """Test the shared session keeps pool_size connections per host and sends the bot User-Agent."""
+        with patch("categorize.wiki.mwclient.Site") as mock_site_class:
+            site = connect_to_commons("user", "password", pool_size=32)
+
+        assert site is mock_site_class.return_value
+        site.login.assert_called_once_with("user", "password")
+        pool = mock_site_class.call_args.kwargs["pool"]
+        assert pool.get_adapter("https://commons.wikimedia.org")._pool_maxsize == 32
+        assert pool.headers["User-Agent"] == f"{wiki.USER_AGENT} {mwclient.client.USER_AGENT}"
+
+    def test_requests_use_bot_user_agent(self):
+        """Test requests sent through a real Site carry the bot User-Agent."""
+        with patch("mwclient.Site.site_init"), patch("mwclient.Site.login"):
+            site = connect_to_commons("user", "password")
+
+        request = requests.Request("GET", "https://commons.wikimedia.org/w/api.php")
+        user_agent = site.connection.prepare_request(request).headers["User-Agent"]
+        assert user_agent == f"{wiki.USER_AGENT} {mwclient.client.USER_AGENT}"
+
+
 @pytest.mark.unit
 class TestCategoryExistsOnPage:
     """Test category existence checking."""
@@ -67,6 +108,86 @@ Some file description here.
         )
         assert result is True, "Category check should be case-insensitive"
 
+    def test_category_found_with_sort_key(self):
+        """Test category with a sort key is found."""
+        page_text = "[[Category:Our World in Data graphs of Canada|Agriculture]]"
+        result = category_exists_on_page(
+            page_text,
+            "Category:Our World in Data graphs of Canada"
+        )
+        assert result is True, "Category with sort key should be found"
+
+    def test_category_found_with_underscores(self):
+        """Test category written with underscores and a lowercase first letter is found."""
+        page_text = "[[Category:our_World_in_Data_graphs_of_Canada]]"
+        result = category_exists_on_page(
+            page_text,
+            "Category:Our World in Data graphs of Canada"
+        )
+        assert result is True, "Category with underscores should be found"
+
+    def test_category_with_different_case_not_found(self):
+        """Test a name differing in case after the first letter is a different category."""
+        page_text = "[[Category:Our_World_in_Data_graphs_of_CANADA]]"
+        result = category_exists_on_page(
+            page_text,
+            "Category:Our World in Data graphs of Canada"
+        )
+        assert result is False, "Differently cased name should not match"
+
+    def test_name_outside_category_not_found(self):
+        """Test the name appearing only in the description is not a match."""
+        page_text = "Agriculture share of GDP in Canada\n[[Category:Our World in Data graphs of Brazil]]"
+        result = category_exists_on_page(
+            page_text,
+            "Category:Our World in Data graphs of Canada"
+        )
+        assert result is False, "Name in description should not count as the category"
+
+    def test_longer_category_not_found(self):
+        """Test a category whose name only starts with the checked name is not a match."""
+        page_text = "[[Category:Our World in Data graphs of Canada by province]]"
+        result = category_exists_on_page(
+            page_text,
+            "Category:Our World in Data graphs of Canada"
+        )
+        assert result is False, "Longer category name should not match"
+
+    def test_text_and_extracted_set_agree(self):
+        """Test checking the text and checking its extracted categories give the same result."""
+        category = "Category:Our World in Data graphs of Canada"
+        for page_text in [
+            "[[CATEGORY: Our_World_in_Data_graphs_of_Canada |key]]",
+            "[[Category:Our World in Data graphs of\nCanada]]",
+            "[[Category:Our World in Data graphs of Canad]]",
+            "[[category:our world in data graphs of canada]]",
+        ]:
+            assert category_exists_on_page(page_text, category) == \
+                category_exists_on_page(extract_categories(page_text), category), page_text
+
+    def test_extract_categories(self):
+        """Test all categories are extracted and normalized."""
+        page_text = """
+[[Category:Our World in Data graphs of Canada|key]]
+[[ category : Economic_indicators ]]
+[[File:Other.svg]]
+"""
+        result = extract_categories(page_text)
+        assert result == {"Our World in Data graphs of Canada", "Economic indicators"}
+
+    def test_extracted_names_keep_case_after_first_letter(self):
+        """Test only the first letter of a category name is case-insensitive."""
+        categories = extract_categories("[[Category:our_World_in_Data_graphs_of_CANADA]]")
+        assert category_exists_on_page(categories, "Category:Our World in Data graphs of CANADA") is True
+        assert category_exists_on_page(categories, "Category:Our World in Data graphs of Canada") is False, \
+            "A differently cased name is a different category"
+
+    def test_category_found_in_extracted_set(self):
+        """Test checking against categories extracted beforehand."""
+        categories = extract_categories("[[Category:Our World in Data graphs of Canada]]")
+        assert category_exists_on_page(categories, "Category:Our World in Data graphs of Canada") is True
+        assert category_exists_on_page(categories, "Category:Our World in Data maps of Canada") is False
+
     def test_empty_page_text(self):
         """Test with empty page text."""
         result = category_exists_on_page(
@@ -84,19 +205,36 @@ Some file description here.
         assert result is False, "Should return False for None page text"
 
 
+def make_page_query(title, text=None):
+    """Build an info|revisions API response (formatversion=2) for a page (missing when text is None)."""
+    if text is None:
+        page = {"ns": 6, "title": title, "missing": True}
+    else:
+        page = {
+            "pageid": 1,
+            "ns": 6,
+            "title": title,
+            "lastrevid": 10,
+            "revisions": [{
+                "revid": 10,
+                "timestamp": "2025-01-01T00:00:00Z",
+                "slots": {"main": {"content": text}},
+            }],
+        }
+    return {"query": {"pages": [page]}}
+
+
 @pytest.mark.unit
 class TestAddCategoryToPage:
     """Test adding categories to pages (with mocks)."""
 
     def test_add_category_to_existing_page(self):
         """Test adding category to an existing page."""
-        # Create mock page and site
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.text.return_value = "Some page text\n[[Category:Existing]]"
-
+        # Create mock site returning page info and text in one query
         mock_site = Mock()
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+        mock_site.api.return_value = make_page_query(
+            "File:Test.svg", "Some page text\n[[Category:Existing]]"
+        )
 
         # Test adding category
         category = "Category:Our World in Data graphs of Canada"
@@ -108,17 +246,15 @@ class TestAddCategoryToPage:
         )
 
         assert result is True, "Should return True when category would be added"
-        assert mock_page.text.called, "Page text should be checked"
+        assert mock_site.api.call_count == 1, "Page info and text should be fetched in one request"
 
     def test_add_category_already_exists(self):
         """Test adding category that already exists."""
         # Create mock page with category already present
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.text.return_value = "Some page text\n[[Category:Our World in Data graphs of Canada]]"
-
         mock_site = Mock()
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+        mock_site.api.return_value = make_page_query(
+            "File:Test.svg", "Some page text\n[[Category:Our World in Data graphs of Canada]]"
+        )
 
         # Test adding existing category
         category = "Category:Our World in Data graphs of Canada"
@@ -134,11 +270,8 @@ class TestAddCategoryToPage:
     def test_add_category_page_not_exists(self):
         """Test adding category to non-existent page."""
         # Create mock page that doesn't exist
-        mock_page = MagicMock()
-        mock_page.exists = False
-
         mock_site = Mock()
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+        mock_site.api.return_value = make_page_query("File:NonExistent.svg")
 
         # Test adding category
         category = "Category:Our World in Data graphs of Canada"
@@ -155,10 +288,9 @@ class TestAddCategoryToPage:
         """Test dry-run mode doesn't make actual edits."""
         # Create mock page
         mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.text.return_value = "Some page text"
-
         mock_site = Mock()
+        mock_site.api.return_value = make_page_query("File:Test.svg", "Some page text")
+        mock_site.pages.get = Mock(return_value=mock_page)
         mock_site.pages.__getitem__ = Mock(return_value=mock_page)
 
         # Test adding category in dry-run
@@ -173,20 +305,325 @@ class TestAddCategoryToPage:
         assert result is True, "Should return True in dry-run mode"
         assert not mock_page.save.called, "Page should not be saved in dry-run mode"
 
+    def test_add_category_saves_with_base_timestamp(self):
+        """Test the edit reuses fetched info and guards against edit conflicts."""
+        mock_page = MagicMock()
+        mock_site = Mock()
+        mock_site.api.return_value = make_page_query("File:Test.svg", "Some page text")
+        mock_site.pages.get = Mock(return_value=mock_page)
+
+        category = "Category:Our World in Data graphs of Canada"
+        with patch("categorize.wiki._wait_for_edit_slot"):
+            result = add_category_to_page(
+                mock_site,
+                "File:Test.svg",
+                category,
+                dry_run=False
+            )
+
+        assert result is True, "Should return True when category is added"
+        mock_page.save.assert_called_once_with(
+            f"Some page text\n[[{category}]]\n",
+            summary=f"Adding [[:{category}]]",
+            basetimestamp="2025-01-01T00:00:00Z",
+        )
+
+    def test_add_category_appends_to_prefetched_page(self):
+        """Test prefetched text is edited with appendtext, without a page lookup."""
+        mock_site = Mock()
+        mock_site.pages.__getitem__ = Mock()
+        mock_site.get_token.return_value = "token+\\"
+        mock_site.post.return_value = {"edit": {"result": "Success"}}
+
+        category = "Category:Our World in Data graphs of Canada"
+        with patch("categorize.wiki._wait_for_edit_slot"):
+            result = add_category_to_page(
+                mock_site,
+                "File:Test.svg",
+                category,
+                page_text="Some page text",
+            )
+
+        assert result is True, "Should return True when category is added"
+        assert not mock_site.pages.__getitem__.called, "Page info should not be queried"
+        mock_site.post.assert_called_once_with(
+            "edit",
+            title="File:Test.svg",
+            appendtext=f"\n[[{category}]]",
+            summary=f"Adding [[:{category}]]",
+            nocreate=1,
+            bot=1,
+            token="token+\\",
+            **{"assert": "user"},
+        )
+
+    def test_add_category_append_refreshes_bad_token(self):
+        """Test a stale edit token is fetched again and the append retried once."""
+        mock_site = Mock()
+        mock_site.get_token.side_effect = ["stale+\\", "fresh+\\"]
+        mock_site.post.side_effect = [
+            mwclient.errors.APIError("badtoken", "Invalid CSRF token.", {}),
+            {"edit": {"result": "Success"}},
+        ]
+
+        with patch("categorize.wiki._wait_for_edit_slot"):
+            result = add_category_to_page(
+                mock_site,
+                "File:Test.svg",
+                "Category:Our World in Data graphs of Canada",
+                page_text="Some page text",
+            )
+
+        assert result is True, "Should return True once the retried edit succeeds"
+        assert mock_site.get_token.call_args_list[1].kwargs == {"force": True}
+        assert [call.kwargs["token"] for call in mock_site.post.call_args_list] == ["stale+\\", "fresh+\\"]
+
+    def test_add_category_append_failure(self):
+        """Test a failed append edit is reported as not added."""
+        mock_site = Mock()
+        mock_site.post.return_value = {"edit": {"result": "Failure"}}
+
+        with patch("categorize.wiki._wait_for_edit_slot"):
+            result = add_category_to_page(
+                mock_site,
+                "File:Test.svg",
+                "Category:Our World in Data graphs of Canada",
+                page_text="Some page text",
+            )
+
+        assert result is False, "Should return False when the edit fails"
+
+
+@pytest.mark.unit
+class TestAddCategoriesToPage:
+    """Test adding several categories to a page in one edit."""
+
+    def test_adds_only_missing_categories(self):
+        """Test existing categories are skipped and the rest saved in one edit."""
+        mock_page = MagicMock()
+        mock_site = Mock()
+        mock_site.api.return_value = make_page_query(
+            "File:Test.svg", "Some page text\n[[Category:Our World in Data graphs of Canada]]"
+        )
+        mock_site.pages.get = Mock(return_value=mock_page)
+
+        categories = [
+            "Category:Our World in Data graphs of Canada",
+            "Category:Our World in Data graphs of North America",
+            "Category:Our World in Data graphs of North America",
+        ]
+        with patch("categorize.wiki._wait_for_edit_slot"):
+            result = add_categories_to_page(mock_site, "File:Test.svg", categories)
+
+        assert result == ["Category:Our World in Data graphs of North America"]
+        assert mock_page.save.call_count == 1, "Should save all categories in one edit"
+
+
+@pytest.mark.unit
+class TestEditRateLimit:
+    """Test the shared edit token bucket."""
+
+    def test_edits_are_paced_after_burst(self, monkeypatch):
+        """Test edits after the burst each wait one more EDIT_DELAY."""
+        monkeypatch.setattr(wiki, "EDIT_DELAY", 2)
+        monkeypatch.setattr(wiki, "EDIT_BURST", 2)
+        monkeypatch.setattr(wiki, "_edit_tokens", 2.0)
+        monkeypatch.setattr(wiki, "_last_refill", 100.0)
+
+        with patch("categorize.wiki.time.monotonic", return_value=100.0), \
+                patch("categorize.wiki.time.sleep") as mock_sleep:
+            for _ in range(4):
+                wiki._wait_for_edit_slot()
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [2.0, 4.0], "Burst of 2, then one edit per delay"
+
+    def test_tokens_refill_over_time(self, monkeypatch):
+        """Test an idle period refills the bucket up to EDIT_BURST."""
+        monkeypatch.setattr(wiki, "EDIT_DELAY", 1)
+        monkeypatch.setattr(wiki, "EDIT_BURST", 1)
+        monkeypatch.setattr(wiki, "_edit_tokens", -3.0)
+        monkeypatch.setattr(wiki, "_last_refill", 100.0)
+
+        with patch("categorize.wiki.time.monotonic", return_value=110.0), \
+                patch("categorize.wiki.time.sleep") as mock_sleep:
+            wiki._wait_for_edit_slot()
+
+        assert not mock_sleep.called, "Should not wait after an idle period"
+
+    def test_failures_halve_edit_rate(self, monkeypatch):
+        """Test edits are paced at half rate after repeated transient failures."""
+        monkeypatch.setattr(wiki, "EDIT_DELAY", 1)
+        monkeypatch.setattr(wiki, "EDIT_BURST", 1)
+        monkeypatch.setattr(wiki, "_edit_tokens", 0.0)
+        monkeypatch.setattr(wiki, "_last_refill", 100.0)
+        monkeypatch.setattr(wiki, "_edit_failures", wiki.EDIT_FAILURE_THRESHOLD)
+
+        with patch("categorize.wiki.time.monotonic", return_value=100.0), \
+                patch("categorize.wiki.time.sleep") as mock_sleep:
+            wiki._wait_for_edit_slot()
+
+        mock_sleep.assert_called_once_with(2.0)
+
+
+@pytest.mark.unit
+class TestEditRetry:
+    """Test retrying edits rejected by rate limiting."""
+
+    @pytest.fixture(autouse=True)
+    def no_waiting(self, monkeypatch):
+        """Skip rate limiting and backoff sleeps."""
+        monkeypatch.setattr(wiki, "_edit_failures", 0)
+        with patch("categorize.wiki._wait_for_edit_slot"), patch("categorize.wiki.time.sleep") as mock_sleep:
+            yield mock_sleep
+
+    def test_rate_limited_edit_is_retried(self, no_waiting):
+        """Test a ratelimited error is retried and then succeeds."""
+        edit = Mock(side_effect=[wiki.mwclient.errors.APIError("ratelimited", "Slow down", {}), None])
+
+        wiki._run_edit(edit)
+
+        assert edit.call_count == 2, "Should retry once"
+        assert no_waiting.call_count == 1, "Should back off before retrying"
+        assert wiki._edit_failures == 0, "Success should reset the failure count"
+
+    def test_other_errors_are_not_retried(self, no_waiting):
+        """Test non-transient errors are raised immediately."""
+        edit = Mock(side_effect=wiki.mwclient.errors.APIError("protectedpage", "Protected", {}))
+
+        with pytest.raises(wiki.mwclient.errors.APIError):
+            wiki._run_edit(edit)
+
+        assert edit.call_count == 1, "Should not retry"
+
+    def test_gives_up_after_max_attempts(self, no_waiting):
+        """Test persistent rate limiting gives up after EDIT_MAX_ATTEMPTS."""
+        edit = Mock(side_effect=wiki.mwclient.errors.APIError("ratelimited", "Slow down", {}))
+
+        with pytest.raises(wiki.mwclient.errors.APIError):
+            wiki._run_edit(edit)
+
+        assert edit.call_count == wiki.EDIT_MAX_ATTEMPTS
+        assert wiki._edit_failures == wiki.EDIT_MAX_ATTEMPTS - 1
+
+
+@pytest.mark.unit
+class TestAddCategoriesBulk:
+    """Test adding categories to many pages concurrently."""
+
+    def test_results_keep_operation_order(self):
+        """Test results are returned in the order of operations."""
+        mock_page = MagicMock()
+        mock_site = Mock()
+        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+
+        category = "Category:Our World in Data graphs of Canada"
+        page_texts = {
+            "File:New.svg": "Some page text",
+            "File:Existing.svg": f"Some page text\n[[{category}]]",
+        }
+
+        result = add_categories_bulk(
+            mock_site,
+            [("File:New.svg", category), ("File:Existing.svg", category)],
+            dry_run=True,
+            page_texts=page_texts,
+        )
+
+        assert result == [True, False], "Should report added/skipped per operation"
+        assert not mock_page.save.called, "Page should not be saved in dry-run mode"
+
+    def test_empty_operations(self):
+        """Test no operations returns an empty list."""
+        assert add_categories_bulk(Mock(), []) == []
+
+
+@pytest.mark.unit
+class TestFetchPagesBulk:
+    """Test batched page text fetching."""
+
+    def test_fetch_pages_bulk_texts(self):
+        """Test texts are mapped back to requested titles."""
+        mock_site = Mock()
+        mock_site.api.return_value = {
+            "query": {
+                "normalized": [{"from": "File:test.svg", "to": "File:Test.svg"}],
+                "pages": [
+                    {
+                        "title": "File:Test.svg",
+                        "revisions": [{"slots": {"main": {"content": "Some page text"}}}],
+                    },
+                    {"title": "File:Missing.svg", "missing": True},
+                ],
+            }
+        }
+
+        result = fetch_pages_bulk(mock_site, ["File:test.svg", "File:Missing.svg"])
+
+        assert result == {"File:test.svg": "Some page text", "File:Missing.svg": None}
+        assert mock_site.api.call_count == 1, "Should fetch all titles in one request"
+
+    def test_fetch_pages_bulk_chunks(self):
+        """Test titles are split into chunks of 50."""
+        mock_site = Mock()
+        mock_site.api.return_value = {"query": {"pages": []}}
+
+        fetch_pages_bulk(mock_site, [f"File:Test {i}.svg" for i in range(120)])
+
+        assert mock_site.api.call_count == 3, "Should issue one request per 50 titles"
+
+    def test_fetch_pages_bulk_follows_continue(self):
+        """Test continued responses are fetched until all texts are returned."""
+        mock_site = Mock()
+        mock_site.api.side_effect = [
+            {
+                "continue": {"rvcontinue": "123|456", "continue": "||"},
+                "query": {"pages": [
+                    {"title": "File:A.svg", "revisions": [{"slots": {"main": {"content": "Text A"}}}]},
+                    {"title": "File:B.svg"},
+                ]},
+            },
+            {
+                "query": {"pages": [
+                    {"title": "File:A.svg"},
+                    {"title": "File:B.svg", "revisions": [{"slots": {"main": {"content": "Text B"}}}]},
+                ]},
+            },
+        ]
+
+        result = fetch_pages_bulk(mock_site, ["File:A.svg", "File:B.svg"])
+
+        assert result == {"File:A.svg": "Text A", "File:B.svg": "Text B"}
+        assert mock_site.api.call_count == 2, "Should follow the continue parameters once"
+        assert mock_site.api.call_args.kwargs["rvcontinue"] == "123|456"
+
+    def test_add_category_with_prefetched_text(self):
+        """Test prefetched page text skips the page lookup."""
+        mock_page = MagicMock()
+        mock_site = Mock()
+        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+
+        result = add_category_to_page(
+            mock_site,
+            "File:Test.svg",
+            "Category:Our World in Data graphs of Canada",
+            dry_run=True,
+            page_text="Some page text",
+        )
+
+        assert result is True, "Should return True when category would be added"
+        assert not mock_page.text.called, "Page text should not be fetched again"
+
 
 @pytest.mark.unit
 class TestEnsureCategoryExists:
     """Test ensuring category pages exist."""
 
-    def test_category_already_exists(self):
+    def test_category_already_exists(self, fake_site, fake_page):
         """Test when category already exists."""
-        mock_site = Mock()
-        mock_page_exists = MagicMock()
-        mock_page_exists.exists = True
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page_exists)
+        site = fake_site({"Category:Our World in Data graphs of Canada": fake_page(exists=True)})
 
         result = ensure_category_exists(
-            mock_site,
+            site,
             "Category:Our World in Data graphs of Canada",
             "Our World in Data graphs by country",
             "Canada",
@@ -211,15 +648,12 @@ class TestEnsureCategoryExists:
         assert result is True, "Should return True in dry-run mode"
         assert not mock_page_not_exists.save.called, "Should not save in dry-run mode"
 
-    def test_category_with_the_prefix(self):
+    def test_category_with_the_prefix(self, fake_site, fake_page):
         """Test creating category for country with 'the' prefix."""
-        mock_site = Mock()
-        mock_page_not_exists = MagicMock()
-        mock_page_not_exists.exists = False
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page_not_exists)
+        site = fake_site({"Category:Our World in Data graphs of the United Kingdom": fake_page(exists=False)})
 
         result = ensure_category_exists(
-            mock_site,
+            site,
             "Category:Our World in Data graphs of the United Kingdom",
             "Our World in Data graphs by country",
             "United Kingdom",
@@ -227,6 +661,39 @@ class TestEnsureCategoryExists:
         )
         assert result is True, "Should return True for countries with 'the' prefix in dry-run mode"
 
+    def test_existing_category_checked_once(self):
+        """Test a category found to exist is not looked up again."""
+        mock_site = Mock()
+        mock_page_exists = MagicMock()
+        mock_page_exists.exists = True
+        mock_site.pages.__getitem__ = Mock(return_value=mock_page_exists)
+
+        for _ in range(3):
+            result = ensure_category_exists(
+                mock_site,
+                "Category:Our World in Data graphs of Canada",
+                "Our World in Data graphs by country",
+                "Canada",
+            )
+            assert result is True, "Should return True when category exists"
+
+        assert mock_site.pages.__getitem__.call_count == 1, "Should look up the category page once"
+
+    def test_ensured_page_reused_for_members(self):
+        """Test listing members reuses the category page loaded when ensuring it."""
+        mock_site = Mock()
+        mock_page_exists = MagicMock()
+        mock_page_exists.exists = True
+        mock_page_exists.members.return_value = iter(["File:A.svg", "File:B.svg"])
+        mock_site.pages.__getitem__ = Mock(return_value=mock_page_exists)
+
+        category = "Category:Our World in Data graphs of Canada"
+        assert ensure_category_exists(mock_site, category, "Our World in Data graphs by country", "Canada") is True
+        members = wiki.get_category_members(mock_site, category)
+
+        assert members == ["File:A.svg", "File:B.svg"]
+        assert mock_site.pages.__getitem__.call_count == 1, "Should look up the category page once"
+
 
 @pytest.mark.unit
 class TestGetCategoryMemberCount:
@@ -234,32 +701,35 @@ class TestGetCategoryMemberCount:
 
     def test_count_members_existing_category(self):
         """Test counting members in an existing category."""
-        # Create mock category page with members
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.members.return_value = [
-            Mock(),
-            Mock(),
-            Mock(),
-        ]  # 3 members
-
         mock_site = Mock()
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+        mock_site.api.return_value = {
+            "query": {
+                "pages": [
+                    {
+                        "title": "Category:Our World in Data graphs of Canada",
+                        "categoryinfo": {"size": 3, "pages": 0, "files": 3, "subcats": 0},
+                    }
+                ]
+            }
+        }
 
         result = get_category_member_count(
             mock_site,
             "Category:Our World in Data graphs of Canada"
         )
         assert result == 3, "Should return correct member count"
+        assert mock_site.api.call_count == 1, "Should use a single API request"
 
     def test_count_members_nonexistent_category(self):
         """Test counting members in a non-existent category."""
-        # Create mock page that doesn't exist
-        mock_page = MagicMock()
-        mock_page.exists = False
-
         mock_site = Mock()
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+        mock_site.api.return_value = {
+            "query": {
+                "pages": [
+                    {"title": "Category:Nonexistent Category", "missing": True}
+                ]
+            }
+        }
 
         result = get_category_member_count(
             mock_site,
@@ -267,15 +737,27 @@ class TestGetCategoryMemberCount:
         )
         assert result == 0, "Should return 0 for non-existent category"
 
+        # Known missing category is not queried again
+        result = get_category_member_count(
+            mock_site,
+            "Category:Nonexistent Category"
+        )
+        assert result == 0
+        assert mock_site.api.call_count == 1, "Should skip the API for known missing categories"
+
     def test_count_members_empty_category(self):
         """Test counting members in an empty category."""
-        # Create mock category page with no members
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.members.return_value = []
-
         mock_site = Mock()
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+        mock_site.api.return_value = {
+            "query": {
+                "pages": [
+                    {
+                        "title": "Category:Our World in Data graphs of Empty Country",
+                        "categoryinfo": {"size": 0, "pages": 0, "files": 0, "subcats": 0},
+                    }
+                ]
+            }
+        }
 
         result = get_category_member_count(
             mock_site,
@@ -283,32 +765,76 @@ class TestGetCategoryMemberCount:
         )
         assert result == 0, "Should return 0 for empty category"
 
+    def test_count_members_bulk(self):
+        """Test many categories are counted in chunks, mapping normalized titles back."""
+        mock_site = Mock()
+        mock_site.api.side_effect = [
+            {
+                "query": {
+                    "normalized": [{"from": "Category:Cat_0", "to": "Category:Cat 0"}],
+                    "pages": [
+                        {"title": "Category:Cat 0", "categoryinfo": {"files": 7}},
+                        {"title": "Category:Cat 1", "missing": True},
+                    ]
+                }
+            },
+            {"query": {"pages": [{"title": "Category:Cat 50", "categoryinfo": {"files": 1}}]}},
+        ]
+        categories = ["Category:Cat_0"] + [f"Category:Cat {i}" for i in range(1, 51)]
+
+        counts = get_category_member_counts_bulk(mock_site, categories)
+
+        assert mock_site.api.call_count == 2, "Should issue one request per 50 categories"
+        assert counts["Category:Cat_0"] == 7
+        assert counts["Category:Cat 1"] == 0
+        assert counts["Category:Cat 50"] == 1
+        assert "Category:Cat 1" in wiki._NONEXISTENT, "Missing category should be remembered"
+
+    def test_count_members_bulk_marks_existing_categories(self):
+        """Test categories found by the count query are not looked up again when ensured."""
+        mock_site = Mock()
+        mock_site.api.return_value = {
+            "query": {
+                "pages": [
+                    {"title": "Category:Cat 0", "categoryinfo": {"files": 2}},
+                    {"title": "Category:Cat 1", "missing": True, "categoryinfo": {"files": 1}},
+                ]
+            }
+        }
+        mock_page = MagicMock()
+        mock_page.exists = False
+        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
+
+        get_category_member_counts_bulk(mock_site, ["Category:Cat 0", "Category:Cat 1"])
+
+        assert ensure_category_exists(mock_site, "Category:Cat 0", "Parent", "Cat 0", dry_run=True) is True
+        assert mock_site.pages.__getitem__.call_count == 0, "Existing category should not be looked up"
+        assert ensure_category_exists(mock_site, "Category:Cat 1", "Parent", "Cat 1", dry_run=True) is True
+        assert mock_site.pages.__getitem__.call_count == 1, "Missing category page should still be checked"
+
 
 @pytest.mark.api
 class TestMockCategorization:
     """Test the categorization workflow with mock objects."""
 
-    def test_mock_page_setup(self):
+    def test_mock_page_setup(self, fake_page):
         """Test basic mock page setup."""
         # Create a mock page
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.text.return_value = "Some page text\n[[Category:Existing]]"
+        mock_page = fake_page(exists=True, _text="Some page text\n[[Category:Existing]]")
 
         # Assertions
         assert mock_page.exists is True, "Mock page should exist"
         assert "Category:Existing" in mock_page.text(), "Mock page should contain existing category"
 
-    def test_simulate_adding_category(self):
+    def test_simulate_adding_category(self, fake_page):
         """Simulate adding a category to page text."""
         # Create mock page
-        mock_page = MagicMock()
-        mock_page.text.return_value = "Some page text\n[[Category:Existing]]"
+        mock_page = fake_page(_text="Some page text\n[[Category:Existing]]")
 
         # Simulate adding a category
         category = "Category:Our World in Data graphs of Canada"
         current_text = mock_page.text()
-        new_text = current_text.rstrip() + f"\n[[{category}]]\n"
+        new_text = f"{current_text.rstrip()}\n[[{category}]]\n"
 
         # Assertions
         assert category in new_text, "New category should be in the updated text"
@@ -0,0 +1,90 @@
+"""
+Shared fixtures for the test suite.
+
+Provides a fake Commons site (and its pages) used by the categorize and
+run_categorize tests in place of a connected mwclient Site.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+import pytest
+
+
+@dataclass
+class FakePage:
+    """Minimal stand-in for an mwclient page exposing exists, text() and members()."""
+    exists: bool = True
+    _text: str = ""
+    member_pages: list = field(default_factory=list)
+
+    def text(self) -> str:
+        return self._text
+
+    def members(self):
+        return iter(self.member_pages)
+
+
+class FakeSite:
+    """
+    Working stand-in for an mwclient site.
+
+    Pages are looked up in a dict (pages not listed exist and have no members).
+    site.api serves file page text from texts as a formatversion=2 revisions query,
+    with titles not in texts given default_text (or reported missing when it is None).
+    Edits made with site.post are recorded; edits to titles in failing_titles are rejected.
+    """
+
+    def __init__(
+        self,
+        pages: Optional[Dict[str, FakePage]] = None,
+        texts: Optional[Dict[str, str]] = None,
+        default_text: Optional[str] = None,
+        failing_titles: Iterable[str] = ()
+    ):
+        self.pages = defaultdict(FakePage, pages or {})
+        self.texts = texts or {}
+        self.default_text = default_text
+        self.failing_titles = set(failing_titles)
+        self.api_calls = []
+        self.edits = []
+
+    def api(self, action, **kwargs):
+        self.api_calls.append(kwargs)
+        pages = []
+        for pageid, title in enumerate(kwargs["titles"].split("|"), start=1):
+            text = self.texts.get(title, self.default_text)
+            if text is None:
+                pages.append({"ns": 6, "title": title, "missing": True})
+                continue
+            pages.append({
+                "pageid": pageid,
+                "ns": 6,
+                "title": title,
+                "touched": "2025-01-01T00:00:00Z",
+                "revisions": [{
+                    "timestamp": "2025-01-01T00:00:00Z",
+                    "slots": {"main": {"content": text}},
+                }],
+            })
+        return {"query": {"pages": pages}}
+
+    def get_token(self, kind, force=False):
+        return "token"
+
+    def post(self, action, **kwargs):
+        self.edits.append(kwargs)
+        result = "Failure" if kwargs["title"] in self.failing_titles else "Success"
+        return {"edit": {"result": result}}
+
+
+@pytest.fixture
+def fake_page():
+    """Factory for FakePage objects."""
+    return FakePage
+
+
+@pytest.fixture
+def fake_site():
+    """Factory for FakeSite objects."""
+    return FakeSite
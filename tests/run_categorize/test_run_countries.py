@@ -5,44 +5,50 @@ Tests the country categorization script functionality including
 processing country files and adding categories to graph files.
 """
 
-import sys
 from pathlib import Path
 import pytest
 from unittest.mock import Mock, MagicMock, patch, mock_open
 import json
 
-# Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
-from run_categorize import process_files
+import categorize.wiki as wiki
+from run_categorize import process_files, prefetch_member_counts, prefetch_category_members, entity_from_file_name
 from owid_config import COUNTRIES_DIR
+from utils import list_json_files, load_json_file
 
 
-@pytest.mark.unit
-class TestProcessFiles:
-    """Test processing country files."""
+@pytest.fixture(scope="module")
+def country_files():
+    """Country JSON files, listed and sorted once for the module."""
+    return list_json_files(COUNTRIES_DIR)
 
-    def test_process_files_basic(self):
-        """Test basic file processing."""
-        # Create mock site
-        mock_site = Mock()
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.text.return_value = "Some page text"
-        mock_site.pages.__getitem__ = Mock(return_value=mock_page)
 
-        # Mock category page
-        mock_cat_page = MagicMock()
-        mock_cat_page.exists = True
+@pytest.fixture(autouse=True)
+def reset_category_state():
+    """Forget categories ensured or looked up by previous tests."""
+    wiki._NONEXISTENT.clear()
+    wiki._ENSURED.clear()
+    wiki._CATEGORY_PAGES.clear()
+    yield
+    wiki._NONEXISTENT.clear()
+    wiki._ENSURED.clear()
+    wiki._CATEGORY_PAGES.clear()
+
 
-        # Setup side_effect to return different pages based on title
-        def get_page(title):
-            if title.startswith("Category:"):
-                return mock_cat_page
-            return mock_page
+@pytest.fixture
+def commons_site(fake_site):
+    """Fake Commons site whose category pages exist and whose file pages all have text."""
+    return fake_site(
+        texts={"File:Test Graph 2.svg": "Some page text\n[[Category:Our World in Data graphs of Canada]]"},
+        default_text="Some page text",
+    )
 
-        mock_site.pages.__getitem__ = Mock(side_effect=get_page)
 
+@pytest.mark.unit
+class TestProcessFiles:
+    """Test processing country files."""
+
+    def test_process_files_basic(self, commons_site):
+        """Test basic file processing."""
         # Create test data
         test_data = {
             "iso3": "CAN",
@@ -60,36 +66,21 @@ class TestProcessFiles:
         }
 
         # Mock file loading
-        with patch("utils.utils.load_json_file", return_value=test_data):
-            with patch("categorize.wiki.get_category_member_count", return_value=0):
+        with patch("run_categorize.load_json_file", return_value=test_data):
+            with patch("run_categorize.get_category_member_count", return_value=0):
                 stats = process_files(
-                    mock_site,
+                    commons_site,
                     COUNTRIES_DIR / "CAN.json",
                     dry_run=True
                 )
 
         # Assertions
-        assert stats["added"] >= 0, "Should have processed some files"
-        assert stats["errors"] == 0, "Should have no errors"
+        assert stats == {"added": 1, "skipped": 1, "errors": 0}, "Graph 2 already has the category"
+        assert len(commons_site.api_calls) == 1, "Page texts should be fetched in one batched request"
+        assert commons_site.api_calls[0]["titles"] == "File:Test Graph 1.svg|File:Test Graph 2.svg"
 
-    def test_process_files_with_limit(self):
+    def test_process_files_with_limit(self, commons_site):
         """Test file processing with per-country limit."""
-        # Create mock site
-        mock_site = Mock()
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.text.return_value = "Some page text"
-
-        mock_cat_page = MagicMock()
-        mock_cat_page.exists = True
-
-        def get_page(title):
-            if title.startswith("Category:"):
-                return mock_cat_page
-            return mock_page
-
-        mock_site.pages.__getitem__ = Mock(side_effect=get_page)
-
         # Create test data with many files
         test_data = {
             "iso3": "USA",
@@ -101,17 +92,19 @@ class TestProcessFiles:
         }
 
         # Mock file loading
-        with patch("utils.utils.load_json_file", return_value=test_data):
-            with patch("categorize.wiki.get_category_member_count", return_value=0):
+        with patch("run_categorize.load_json_file", return_value=test_data):
+            with patch("run_categorize.get_category_member_count", return_value=0):
                 stats = process_files(
-                    mock_site,
+                    commons_site,
                     COUNTRIES_DIR / "USA.json",
                     dry_run=True,
                     files_per_one=3
                 )
 
         # Should only process 3 files
-        assert stats["added"] + stats["skipped"] <= 3, "Should respect per-country limit"
+        assert stats == {"added": 3, "skipped": 0, "errors": 0}, "Should respect per-country limit"
+        assert len(commons_site.api_calls) == 1, "Page texts should be fetched in one batched request"
+        assert commons_site.api_calls[0]["titles"].count("|") == 2, "Should fetch only 3 pages"
 
     def test_process_files_missing_country(self):
         """Test processing file with missing country name."""
@@ -123,7 +116,7 @@ class TestProcessFiles:
             "graphs": []
         }
 
-        with patch("utils.utils.load_json_file", return_value=test_data):
+        with patch("run_categorize.load_json_file", return_value=test_data):
             stats = process_files(
                 mock_site,
                 COUNTRIES_DIR / "XXX.json",
@@ -136,7 +129,7 @@ class TestProcessFiles:
         """Test processing invalid JSON file."""
         mock_site = Mock()
 
-        with patch("utils.utils.load_json_file", return_value=None):
+        with patch("run_categorize.load_json_file", return_value=None):
             stats = process_files(
                 mock_site,
                 COUNTRIES_DIR / "invalid.json",
@@ -146,6 +139,170 @@ class TestProcessFiles:
         assert stats["errors"] > 0, "Should have error for invalid JSON"
 
 
+@pytest.mark.unit
+class TestProcessFilesEdits:
+    """Test edits made by process_files through the edit worker pool."""
+
+    def test_edit_results_reach_stats(self, fake_site, monkeypatch):
+        """Test added, skipped and failed edits are counted in the returned stats."""
+        category = "Category:Our World in Data graphs of Canada"
+        site = fake_site(
+            texts={
+                "File:Graph 1.svg": "Some page text",
+                "File:Graph 2.svg": f"Some page text\n[[{category}]]",
+                "File:Graph 4.svg": "Some page text",
+                "File:Graph 5.svg": "Some page text",
+            },
+            failing_titles=["File:Graph 4.svg"],
+        )
+        test_data = {
+            "iso3": "CAN",
+            "country": "Canada",
+            "graphs": [{"title": f"File:Graph {i}.svg"} for i in range(1, 6)],
+        }
+        monkeypatch.setattr(wiki, "_edit_failures", 0)
+
+        with patch("run_categorize.load_json_file", return_value=test_data), \
+                patch("categorize.wiki._wait_for_edit_slot"):
+            stats = process_files(site, COUNTRIES_DIR / "CAN.json", edit_workers=2)
+
+        # Graph 1 and 5 are edited; 2 already has the category, 3 doesn't exist, 4 is rejected
+        assert stats == {"added": 2, "skipped": 3, "errors": 0}
+        assert site.api_calls[0]["titles"] == "|".join(f"File:Graph {i}.svg" for i in range(1, 6)), \
+            "Page texts should be fetched in one batched request"
+        edited = sorted(edit["title"] for edit in site.edits)
+        assert edited == ["File:Graph 1.svg", "File:Graph 4.svg", "File:Graph 5.svg"]
+        assert all(edit["appendtext"] == f"\n[[{category}]]" for edit in site.edits), \
+            "Category should be appended to the page"
+
+    def test_dry_run_makes_no_edits(self, fake_site):
+        """Test dry-run results are counted without editing."""
+        site = fake_site(default_text="Some page text")
+        test_data = {
+            "iso3": "CAN",
+            "country": "Canada",
+            "graphs": [{"title": "File:Graph 1.svg"}, {"title": "File:Graph 2.svg"}],
+        }
+
+        with patch("run_categorize.load_json_file", return_value=test_data):
+            stats = process_files(site, COUNTRIES_DIR / "CAN.json", dry_run=True, edit_workers=2)
+
+        assert stats == {"added": 2, "skipped": 0, "errors": 0}
+        assert site.edits == [], "Dry run should not edit"
+
+
+@pytest.mark.unit
+class TestPrefetchMemberCounts:
+    """Test prefetching category member counts."""
+
+    def test_prefetch_member_counts(self, tmp_path):
+        """Test the counts of all distinct categories are fetched in one batch."""
+        for iso3, country in [("CAN", "Canada"), ("BRA", "Brazil"), ("CA2", "Canada")]:
+            (tmp_path / f"{iso3}.json").write_text(json.dumps({"iso3": iso3, "country": country}), encoding="utf-8")
+        (tmp_path / "bad.json").write_text(json.dumps({"iso3": "XXX"}), encoding="utf-8")
+
+        mock_site = Mock()
+        mock_site.api.return_value = {
+            "query": {
+                "pages": [
+                    {"title": "Category:Our World in Data graphs of Brazil", "categoryinfo": {"files": 2}},
+                    {"title": "Category:Our World in Data graphs of Canada", "categoryinfo": {"files": 5}},
+                ]
+            }
+        }
+        counts = prefetch_member_counts(mock_site, sorted(tmp_path.glob("*.json")))
+
+        assert counts == {
+            "Category:Our World in Data graphs of Brazil": 2,
+            "Category:Our World in Data graphs of Canada": 5,
+        }
+        assert mock_site.api.call_count == 1, "Should query all categories in one request"
+        assert mock_site.api.call_args.kwargs["titles"] == (
+            "Category:Our World in Data graphs of Brazil|Category:Our World in Data graphs of Canada"
+        )
+
+    def test_process_files_uses_prefetched_count(self, tmp_path):
+        """Test a prefetched count skips the member count lookup."""
+        file_path = tmp_path / "CAN.json"
+        file_path.write_text(json.dumps({
+            "iso3": "CAN",
+            "country": "Canada",
+            "graphs": [{"title": "File:Test Graph 1.svg"}],
+        }), encoding="utf-8")
+
+        with patch("run_categorize.get_category_member_count") as mock_count:
+            stats = process_files(
+                Mock(),
+                file_path,
+                dry_run=True,
+                files_per_one=1,
+                member_counts={"Category:Our World in Data graphs of Canada": 1},
+            )
+
+        assert not mock_count.called, "Should use the prefetched count"
+        assert stats == {"added": 0, "skipped": 0, "errors": 0}, "Category already has enough files"
+
+    def test_prefetch_category_members(self, tmp_path):
+        """Test members are fetched once per category, leaving out full categories."""
+        for iso3, country in [("CAN", "Canada"), ("BRA", "Brazil"), ("CA2", "Canada"), ("FRA", "France")]:
+            (tmp_path / f"{iso3}.json").write_text(json.dumps({"iso3": iso3, "country": country}), encoding="utf-8")
+
+        with patch("run_categorize.fetch_category_members_many", return_value={}) as mock_fetch:
+            prefetch_category_members(
+                sorted(tmp_path.glob("*.json")),
+                files_per_one=2,
+                member_counts={"Category:Our World in Data graphs of France": 2},
+            )
+
+        mock_fetch.assert_called_once_with([
+            "Category:Our World in Data graphs of Brazil",
+            "Category:Our World in Data graphs of Canada",
+        ])
+
+    def test_process_files_uses_prefetched_members(self, commons_site):
+        """Test prefetched member titles filter files without listing the category."""
+        category = "Category:Our World in Data graphs of Canada"
+        test_data = {
+            "iso3": "CAN",
+            "country": "Canada",
+            "graphs": [{"title": "File:Test Graph 1.svg"}, {"title": "File:Test Graph 3.svg"}],
+        }
+
+        with patch("run_categorize.load_json_file", return_value=test_data), \
+                patch("run_categorize.get_category_members") as mock_members:
+            stats = process_files(
+                commons_site,
+                COUNTRIES_DIR / "CAN.json",
+                dry_run=True,
+                category_members={category: ["File:Test Graph 1.svg"]},
+            )
+
+        assert not mock_members.called, "Should use the prefetched members"
+        assert stats == {"added": 1, "skipped": 1, "errors": 0}, "Graph 1 is already a member"
+        assert commons_site.api_calls[0]["titles"] == "File:Test Graph 3.svg"
+
+    def test_full_category_skips_json_loading(self):
+        """Test a full category is skipped without reading the JSON file."""
+        with patch("run_categorize.load_json_file") as mock_load:
+            stats = process_files(
+                Mock(),
+                Path("North_America.json"),
+                dry_run=True,
+                files_per_one=2,
+                country_or_continent="continent",
+                member_counts={"Category:Our World in Data graphs of North America": 5},
+            )
+
+        assert not mock_load.called, "Should not load the JSON file"
+        assert stats == {"added": 0, "skipped": 0, "errors": 0}
+
+    def test_entity_from_file_name(self):
+        """Test names derived from country and continent file names."""
+        assert entity_from_file_name(Path("CAN.json")) == "Canada"
+        assert entity_from_file_name(Path("XXX.json")) is None
+        assert entity_from_file_name(Path("South_America.json"), "continent") == "South America"
+
+
 @pytest.mark.filesystem
 class TestCountryFilesExist:
     """Test that country files exist and have correct structure."""
@@ -158,22 +315,21 @@ class TestCountryFilesExist:
 
         assert countries_dir.is_dir(), "Countries directory should exist"
 
-    def test_country_json_structure(self):
+    def test_country_json_structure(self, country_files):
         """Test structure of country JSON files."""
         countries_dir = COUNTRIES_DIR
 
         if not countries_dir.exists():
             pytest.skip("Countries directory not found")
 
-        json_files = list(countries_dir.glob("*.json"))
+        json_files = country_files
 
         if not json_files:
             pytest.skip("No country JSON files found")
 
-        # Test first file
-        first_file = json_files[0]
-        with open(first_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # Test first file (read through the project's loader: orjson on raw bytes when installed)
+        data = load_json_file(json_files[0])
+        assert data is not None, "Country file should be valid JSON"
 
         # Check required fields
         assert "country" in data, "Country field should exist"
@@ -188,39 +344,23 @@ class TestCountryFilesExist:
 class TestDryRunSimulation:
     """Integration tests with dry-run simulation."""
 
-    def test_dry_run_with_sample_data(self):
+    def test_dry_run_with_sample_data(self, country_files, commons_site):
         """Test dry-run processing with sample data."""
         countries_dir = COUNTRIES_DIR
 
         if not countries_dir.exists():
             pytest.skip("Countries directory not found")
 
-        json_files = list(countries_dir.glob("*.json"))
+        json_files = country_files
 
         if not json_files:
             pytest.skip("No country JSON files found")
 
-        # Create mock site
-        mock_site = Mock()
-        mock_page = MagicMock()
-        mock_page.exists = True
-        mock_page.text.return_value = "Test content"
-
-        mock_cat_page = MagicMock()
-        mock_cat_page.exists = True
-
-        def get_page(title):
-            if title.startswith("Category:"):
-                return mock_cat_page
-            return mock_page
-
-        mock_site.pages.__getitem__ = Mock(side_effect=get_page)
-
         # Process first 3 countries in dry-run
-        for json_file in sorted(json_files)[:3]:
-            with patch("categorize.wiki.get_category_member_count", return_value=0):
+        for json_file in json_files[:3]:
+            with patch("run_categorize.get_category_member_count", return_value=0):
                 stats = process_files(
-                    mock_site,
+                    commons_site,
                     json_file,
                     dry_run=True
                 )
@@ -6,13 +6,8 @@ This script demonstrates the functionality without requiring network access.
 """
 
 import json
-import sys
-from pathlib import Path
 import pytest
 
-# Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
 from fetch_commons_files import (
     classify_and_parse_file,
     fetch_files,
@@ -23,20 +18,25 @@ from fetch_commons_files import (
 )
 
 
-def create_sample_data() -> list[str]:
-    """Create sample file data for testing."""
-    return [
-        "File:Agriculture share gdp, 1997 to 2021, CAN.svg",
-        "File:Access to clean fuels and technologies for cooking, Canada, 1990.svg",
-        "File:Agriculture share gdp, 2000 to 2022, USA.svg",
-        "File:CO2 emissions, 1990 to 2021, GBR.svg",
-        "File:Educational attainment, Germany, 2018.svg",
-        "File:GDP per capita, United States, 2020.svg",
-        "File:Income inequality, 1980 to 2020, DEU.svg",
-        "File:Life expectancy, 1950 to 2020, BRA.svg",
-        "File:Population density, Brazil, 2019.svg",
-        "File:Renewable energy share, United Kingdom, 2021.svg",
-    ]
+# Sample file titles (a tuple, so tests can't modify the shared data)
+SAMPLE_FILES = (
+    "File:Agriculture share gdp, 1997 to 2021, CAN.svg",
+    "File:Access to clean fuels and technologies for cooking, Canada, 1990.svg",
+    "File:Agriculture share gdp, 2000 to 2022, USA.svg",
+    "File:CO2 emissions, 1990 to 2021, GBR.svg",
+    "File:Educational attainment, Germany, 2018.svg",
+    "File:GDP per capita, United States, 2020.svg",
+    "File:Income inequality, 1980 to 2020, DEU.svg",
+    "File:Life expectancy, 1950 to 2020, BRA.svg",
+    "File:Population density, Brazil, 2019.svg",
+    "File:Renewable energy share, United Kingdom, 2021.svg",
+)
+
+
+@pytest.fixture(scope="session")
+def sample_files() -> tuple[str, ...]:
+    """Sample file titles shared by all tests."""
+    return SAMPLE_FILES
 
 
 @pytest.mark.unit
@@ -80,10 +80,8 @@ def test_classification():
 
 
 @pytest.mark.integration
-def test_processing():
+def test_processing(sample_files):
     """Test full processing pipeline with sample data."""
-    # Create sample data
-    sample_files = create_sample_data()
     assert len(sample_files) == 10, "Should have 10 sample files"
 
     # Process files
@@ -126,6 +124,20 @@ def test_processing():
     with open(summary_file, "r", encoding="utf-8") as f:
         summary = json.load(f)
 
+    # Verify country file entries are written as dicts
+    with open(COUNTRIES_DIR / "CAN.json", "r", encoding="utf-8") as f:
+        can_json = json.load(f)
+
+    assert can_json["graphs"][0] == {
+        "title": "File:Agriculture share gdp, 1997 to 2021, CAN.svg",
+        "indicator": "Agriculture share gdp",
+        "start_year": 1997,
+        "end_year": 2021,
+        "file_page": "https://commons.wikimedia.org/wiki/File:Agriculture_share_gdp,_1997_to_2021,_CAN.svg"
+    }, "Graph entry should be written with all fields"
+    assert all(set(m) == {"title", "indicator", "year", "region", "file_page"} for m in can_json["maps"]), \
+        "Map entries should be written with all fields"
+
     assert isinstance(summary, dict), "Summary should be a dict"
     assert len(summary["countries"]) == len(countries), "Summary should have entry for each country"
 
@@ -136,3 +148,13 @@ def test_processing():
         assert 'map_count' in entry, "Summary entry should have map_count"
         assert isinstance(entry['graph_count'], int), "graph_count should be integer"
         assert isinstance(entry['map_count'], int), "map_count should be integer"
+
+
+@pytest.mark.unit
+def test_duplicate_titles():
+    """Test duplicate titles are classified and listed only once."""
+    title = "File:Agriculture share gdp, 1997 to 2021, CAN.svg"
+    countries, continents, not_matched = fetch_files([title, title, "File:Other.png", "File:Other.png"])
+
+    assert len(countries["CAN"]["graphs"]) == 1, "Duplicate graph should be added once"
+    assert not_matched == ["File:Other.png"], "Duplicate unmatched title should be listed once"
@@ -5,20 +5,55 @@ Tests utility functions for country name normalization, category building,
 and JSON file loading.
 """
 
-import sys
+import os
 from pathlib import Path
 import pytest
 import json
-from unittest.mock import patch, mock_open
-
-# Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+from unittest.mock import patch
 
 from utils import (
     normalize_country_name,
     build_category_name,
     get_parent_category,
     load_json_file,
+    list_json_files,
+    write_json_file,
+)
+
+
+# Countries normalized with a "the" prefix, and countries left unchanged
+_NORMALIZED_THE_CASES = (
+    ("Democratic Republic of Congo", "the Democratic Republic of Congo"),
+    ("Dominican Republic", "the Dominican Republic"),
+    ("Philippines", "the Philippines"),
+    ("Netherlands", "the Netherlands"),
+    ("United Arab Emirates", "the United Arab Emirates"),
+    ("United Kingdom", "the United Kingdom"),
+    ("United States", "the United States"),
+    ("Czech Republic", "the Czech Republic"),
+    ("Central African Republic", "the Central African Republic"),
+    ("Maldives", "the Maldives"),
+    ("Seychelles", "the Seychelles"),
+    ("Bahamas", "the Bahamas"),
+    ("Marshall Islands", "the Marshall Islands"),
+    ("Solomon Islands", "the Solomon Islands"),
+    ("Comoros", "the Comoros"),
+    ("Gambia", "the Gambia"),
+    ("Vatican City", "the Vatican City"),
+    ("Vatican", "the Vatican"),
+)
+
+_UNCHANGED_COUNTRIES = (
+    "Canada",
+    "Brazil",
+    "Germany",
+    "France",
+    "India",
+    "China",
+    "Japan",
+    "Australia",
+    "Mexico",
+    "Egypt",
 )
 
 
@@ -26,105 +61,73 @@ from utils import (
 class TestNormalizeCountryName:
     """Test country name normalization with 'the' prefix."""
 
-    def test_countries_with_the_prefix(self):
+    @pytest.mark.parametrize("country, expected", _NORMALIZED_THE_CASES)
+    def test_countries_with_the_prefix(self, country, expected):
         """Test countries that should have 'the' prefix."""
-        test_cases = [
-            ("Democratic Republic of Congo", "the Democratic Republic of Congo"),
-            ("Dominican Republic", "the Dominican Republic"),
-            ("Philippines", "the Philippines"),
-            ("Netherlands", "the Netherlands"),
-            ("United Arab Emirates", "the United Arab Emirates"),
-            ("United Kingdom", "the United Kingdom"),
-            ("United States", "the United States"),
-            ("Czech Republic", "the Czech Republic"),
-            ("Central African Republic", "the Central African Republic"),
-            ("Maldives", "the Maldives"),
-            ("Seychelles", "the Seychelles"),
-            ("Bahamas", "the Bahamas"),
-            ("Marshall Islands", "the Marshall Islands"),
-            ("Solomon Islands", "the Solomon Islands"),
-            ("Comoros", "the Comoros"),
-            ("Gambia", "the Gambia"),
-            ("Vatican City", "the Vatican City"),
-            ("Vatican", "the Vatican"),
-        ]
-
-        for country, expected in test_cases:
-            result = normalize_country_name(country)
-            assert result == expected, f"Expected '{expected}' but got '{result}' for country '{country}'"
-
-    def test_countries_without_the_prefix(self):
+        result = normalize_country_name(country)
+        assert result == expected, f"Expected '{expected}' but got '{result}' for country '{country}'"
+
+    @pytest.mark.parametrize("country", _UNCHANGED_COUNTRIES)
+    def test_countries_without_the_prefix(self, country):
         """Test countries that should NOT have 'the' prefix."""
-        test_cases = [
-            ("Canada", "Canada"),
-            ("Brazil", "Brazil"),
-            ("Germany", "Germany"),
-            ("France", "France"),
-            ("India", "India"),
-            ("China", "China"),
-            ("Japan", "Japan"),
-            ("Australia", "Australia"),
-            ("Mexico", "Mexico"),
-            ("Egypt", "Egypt"),
-        ]
-
-        for country, expected in test_cases:
-            result = normalize_country_name(country)
-            assert result == expected, f"Expected '{expected}' but got '{result}' for country '{country}'"
+        result = normalize_country_name(country)
+        assert result == country, f"Expected '{country}' but got '{result}'"
+
+
+# Expected category names
+_REGULAR_COUNTRY_CASES = (
+    ("Canada", "Category:Our World in Data graphs of Canada"),
+    ("Brazil", "Category:Our World in Data graphs of Brazil"),
+    ("Germany", "Category:Our World in Data graphs of Germany"),
+    ("France", "Category:Our World in Data graphs of France"),
+)
+
+_THE_COUNTRY_CASES = (
+    ("United Kingdom", "Category:Our World in Data graphs of the United Kingdom"),
+    ("United States", "Category:Our World in Data graphs of the United States"),
+    ("Philippines", "Category:Our World in Data graphs of the Philippines"),
+    ("Netherlands", "Category:Our World in Data graphs of the Netherlands"),
+    ("Dominican Republic", "Category:Our World in Data graphs of the Dominican Republic"),
+    ("United Arab Emirates", "Category:Our World in Data graphs of the United Arab Emirates"),
+    ("Czech Republic", "Category:Our World in Data graphs of the Czech Republic"),
+    ("Central African Republic", "Category:Our World in Data graphs of the Central African Republic"),
+    ("Bahamas", "Category:Our World in Data graphs of the Bahamas"),
+    ("Maldives", "Category:Our World in Data graphs of the Maldives"),
+    ("Seychelles", "Category:Our World in Data graphs of the Seychelles"),
+)
+
+_CONTINENT_CASES = (
+    ("Africa", "Category:Our World in Data graphs of Africa"),
+    ("Asia", "Category:Our World in Data graphs of Asia"),
+    ("Europe", "Category:Our World in Data graphs of Europe"),
+    ("North America", "Category:Our World in Data graphs of North America"),
+    ("South America", "Category:Our World in Data graphs of South America"),
+    ("Oceania", "Category:Our World in Data graphs of Oceania"),
+    ("World", "Category:Our World in Data graphs of the world"),
+)
 
 
 @pytest.mark.unit
 class TestBuildCategoryName:
     """Test category name construction."""
 
-    def test_regular_countries(self):
+    @pytest.mark.parametrize("country, expected", _REGULAR_COUNTRY_CASES)
+    def test_regular_countries(self, country, expected):
         """Test category names for regular countries."""
-        test_cases = [
-            ("Canada", "Category:Our World in Data graphs of Canada"),
-            ("Brazil", "Category:Our World in Data graphs of Brazil"),
-            ("Germany", "Category:Our World in Data graphs of Germany"),
-            ("France", "Category:Our World in Data graphs of France"),
-        ]
-
-        for country, expected in test_cases:
-            result = build_category_name(country, "country", "graphs")
-            assert result == expected, f"Expected '{expected}' but got '{result}' for country '{country}'"
-
-    def test_countries_with_the_prefix(self):
+        result = build_category_name(country, "country", "graphs")
+        assert result == expected, f"Expected '{expected}' but got '{result}' for country '{country}'"
+
+    @pytest.mark.parametrize("country, expected", _THE_COUNTRY_CASES)
+    def test_countries_with_the_prefix(self, country, expected):
         """Test category names for countries requiring 'the' prefix."""
-        test_cases = [
-            ("United Kingdom", "Category:Our World in Data graphs of the United Kingdom"),
-            ("United States", "Category:Our World in Data graphs of the United States"),
-            ("Philippines", "Category:Our World in Data graphs of the Philippines"),
-            ("Netherlands", "Category:Our World in Data graphs of the Netherlands"),
-            ("Dominican Republic", "Category:Our World in Data graphs of the Dominican Republic"),
-            ("United Arab Emirates", "Category:Our World in Data graphs of the United Arab Emirates"),
-            ("Czech Republic", "Category:Our World in Data graphs of the Czech Republic"),
-            ("Central African Republic", "Category:Our World in Data graphs of the Central African Republic"),
-            ("Bahamas", "Category:Our World in Data graphs of the Bahamas"),
-            ("Maldives", "Category:Our World in Data graphs of the Maldives"),
-            ("Seychelles", "Category:Our World in Data graphs of the Seychelles"),
-        ]
-
-        for country, expected in test_cases:
-            result = build_category_name(country, "country", "graphs")
-            assert result == expected, f"Expected '{expected}' but got '{result}' for country '{country}'"
-
-    def test_continents(self):
+        result = build_category_name(country, "country", "graphs")
+        assert result == expected, f"Expected '{expected}' but got '{result}' for country '{country}'"
+
+    @pytest.mark.parametrize("continent, expected", _CONTINENT_CASES)
+    def test_continents(self, continent, expected):
         """Test category names for continents."""
-        test_cases = [
-            ("Africa", "Category:Our World in Data graphs of Africa"),
-            ("Asia", "Category:Our World in Data graphs of Asia"),
-            ("Europe", "Category:Our World in Data graphs of Europe"),
-            ("North America", "Category:Our World in Data graphs of North America"),
-            ("South America", "Category:Our World in Data graphs of South America"),
-            ("Oceania", "Category:Our World in Data graphs of Oceania"),
-            ("World", "Category:Our World in Data graphs of the world"),
-        ]
-
-        for continent, expected in test_cases:
-            result = build_category_name(continent, "continent", "graphs")
-            assert result == expected, f"Expected '{expected}' but got '{result}' for continent '{continent}'"
+        result = build_category_name(continent, "continent", "graphs")
+        assert result == expected, f"Expected '{expected}' but got '{result}' for continent '{continent}'"
 
     def test_predefined_categories(self):
         """Test predefined categories like World."""
@@ -169,7 +172,7 @@ class TestGetParentCategory:
 class TestLoadJsonFile:
     """Test JSON file loading."""
 
-    def test_load_valid_json(self):
+    def test_load_valid_json(self, tmp_path):
         """Test loading a valid JSON file."""
         test_data = {
             "iso3": "CAN",
@@ -177,9 +180,10 @@ class TestLoadJsonFile:
             "graphs": [],
             "maps": []
         }
+        test_file = tmp_path / "test.json"
+        test_file.write_text(json.dumps(test_data), encoding="utf-8")
 
-        with patch("builtins.open", mock_open(read_data=json.dumps(test_data))):
-            result = load_json_file(Path("test.json"))
+        result = load_json_file(test_file)
 
         assert result is not None
         assert result["iso3"] == "CAN"
@@ -187,14 +191,97 @@ class TestLoadJsonFile:
         assert "graphs" in result
         assert "maps" in result
 
-    def test_load_invalid_json(self):
+    def test_load_invalid_json(self, tmp_path):
         """Test loading an invalid JSON file."""
-        with patch("builtins.open", mock_open(read_data="invalid json")):
-            result = load_json_file(Path("invalid.json"))
+        test_file = tmp_path / "invalid.json"
+        test_file.write_text("invalid json", encoding="utf-8")
+
+        result = load_json_file(test_file)
 
         assert result is None
 
+    def test_load_empty_file(self, tmp_path):
+        """Test an empty file is rejected without parsing it."""
+        test_file = tmp_path / "empty.json"
+        test_file.touch()
+
+        with patch("utils.utils._load_json_cached") as mock_load:
+            result = load_json_file(test_file)
+
+        assert result is None
+        mock_load.assert_not_called()
+
     def test_load_nonexistent_file(self):
         """Test loading a nonexistent file."""
         result = load_json_file(Path("nonexistent.json"))
         assert result is None
+
+    def test_reload_after_modification(self, tmp_path):
+        """Test cached data is reused until the file changes."""
+        test_file = tmp_path / "test.json"
+        test_file.write_text(json.dumps({"country": "Canada"}), encoding="utf-8")
+
+        first = load_json_file(test_file)
+        assert load_json_file(test_file) is first, "Unchanged file should come from the cache"
+
+        test_file.write_text(json.dumps({"country": "Brazil"}), encoding="utf-8")
+        mtime = test_file.stat().st_mtime + 10
+        os.utime(test_file, (mtime, mtime))
+
+        assert load_json_file(test_file)["country"] == "Brazil", "Modified file should be parsed again"
+
+    def test_reload_after_rewrite_with_same_mtime(self, tmp_path):
+        """Test a rewrite that keeps the modification time is noticed by its size."""
+        test_file = tmp_path / "test.json"
+        test_file.write_text(json.dumps({"country": "Canada"}), encoding="utf-8")
+        mtime_ns = test_file.stat().st_mtime_ns
+
+        assert load_json_file(test_file)["country"] == "Canada"
+
+        test_file.write_text(json.dumps({"country": "Côte d'Ivoire"}), encoding="utf-8")
+        os.utime(test_file, ns=(mtime_ns, mtime_ns))
+
+        assert load_json_file(test_file)["country"] == "Côte d'Ivoire", "Rewritten file should be parsed again"
+
+
+@pytest.mark.unit
+class TestListJsonFiles:
+    """Test listing JSON files."""
+
+    def test_lists_sorted_json_files(self, tmp_path):
+        """Test only JSON files are listed, sorted by name."""
+        for name in ["USA.json", "CAN.json", "notes.txt"]:
+            (tmp_path / name).write_text("{}", encoding="utf-8")
+        (tmp_path / "dir.json").mkdir()
+
+        assert list_json_files(tmp_path) == [tmp_path / "CAN.json", tmp_path / "USA.json"]
+
+    def test_missing_directory(self, tmp_path):
+        """Test a missing directory gives an empty list."""
+        assert list_json_files(tmp_path / "missing") == []
+
+
+@pytest.mark.unit
+class TestWriteJsonFile:
+    """Test JSON file writing."""
+
+    def test_write_compact_by_default(self, tmp_path, monkeypatch):
+        """Test output is compact, non-ASCII JSON by default."""
+        monkeypatch.delenv("OWID_PRETTY", raising=False)
+        test_data = {"country": "Côte d'Ivoire", "graphs": [{"title": "File:A.svg"}], "maps": []}
+        test_file = tmp_path / "CIV.json"
+
+        write_json_file(test_file, test_data)
+
+        expected = json.dumps(test_data, ensure_ascii=False, separators=(",", ":"))
+        assert test_file.read_text(encoding="utf-8") == expected
+
+    def test_write_pretty_when_requested(self, tmp_path, monkeypatch):
+        """Test OWID_PRETTY switches to the indented format of json.dumps."""
+        monkeypatch.setenv("OWID_PRETTY", "1")
+        test_data = {"country": "Côte d'Ivoire", "graphs": [{"title": "File:A.svg"}], "maps": []}
+        test_file = tmp_path / "CIV.json"
+
+        write_json_file(test_file, test_data)
+
+        assert test_file.read_text(encoding="utf-8") == json.dumps(test_data, indent=2, ensure_ascii=False)